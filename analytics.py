@@ -0,0 +1,202 @@
+"""Отчёты по журналу смен статусов: сроки ревью и доля возвратов.
+
+Запуск::
+
+    python analytics.py --state-file state.sqlite3 --days 90 --by week
+
+Смены статусов из ``history`` загружаются в массивы NumPy: время —
+``int64``, статусы — коды ``uint8`` по порядку ключей
+``HOMEWORK_VERDICTS`` (0 — неизвестный статус). Срок ревью — время от
+перехода в ``reviewing`` до следующего ``approved`` или ``rejected``
+той же домашки. Перцентили, доля возвратов и гистограмма считаются
+операциями над массивами, без циклов Python по записям. Группы: все
+вместе, по чатам (когортам) или по неделям завершения ревью.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import homework
+
+STATUS_CODES = {
+    status: code
+    for code, status in enumerate(homework.HOMEWORK_VERDICTS, start=1)
+}
+REVIEWING = STATUS_CODES['reviewing']
+APPROVED = STATUS_CODES['approved']
+REJECTED = STATUS_CODES['rejected']
+WEEK = 7 * 24 * 60 * 60
+# 1 января 1970 года — четверг; недели отсчитываются с понедельника.
+WEEK_OFFSET = 3 * 24 * 60 * 60
+HOUR = 60 * 60
+PERCENTILES = (0.5, 0.9, 0.99)
+HISTOGRAM_BINS = (0, 1, 4, 12, 24, 48, 72, 168, np.inf)
+GROUPINGS = ('all', 'cohort', 'week')
+
+Transitions = namedtuple('Transitions',
+                         ('chat', 'homework', 'status', 'changed_at', 'chats'))
+Reviews = namedtuple('Reviews', ('chat', 'finished_at', 'duration',
+                                 'outcome', 'chats'))
+
+
+def encode_statuses(statuses):
+    """Коды статусов ``uint8``; неизвестные статусы получают 0."""
+    return np.fromiter((STATUS_CODES.get(status, 0) for status in statuses),
+                       dtype=np.uint8, count=len(statuses))
+
+
+def load_transitions(path, start=0, end=None):
+    """Смены статусов из журнала в ``path`` за период в массивах."""
+    end = int(time.time()) + 1 if end is None else end
+    connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = connection.execute(
+            'SELECT chat_id, homework, status, changed_at FROM transitions '
+            'WHERE changed_at >= ? AND changed_at < ?', (int(start), int(end))
+        ).fetchall()
+    finally:
+        connection.close()
+    return make_transitions(rows)
+
+
+def make_transitions(rows):
+    """Массивы из строк ``(чат, домашка, статус, время)``."""
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return Transitions(empty, empty, empty.astype(np.uint8), empty,
+                           np.empty(0, dtype=object))
+    chats, homeworks, statuses, times = zip(*rows)
+    chat_names, chat = np.unique(np.array(chats, dtype=object),
+                                 return_inverse=True)
+    _, homework_ids = np.unique(
+        np.array([f'{chat_id}:{key}' for chat_id, key
+                  in zip(chats, homeworks)], dtype=object),
+        return_inverse=True)
+    return Transitions(chat.astype(np.int64), homework_ids.astype(np.int64),
+                       encode_statuses(statuses),
+                       np.array(times, dtype=np.int64), chat_names)
+
+
+def reviews(transitions):
+    """Завершённые ревью: ``reviewing`` и следующий вердикт домашки."""
+    order = np.lexsort((transitions.changed_at, transitions.homework))
+    homework_ids = transitions.homework[order]
+    status = transitions.status[order]
+    changed_at = transitions.changed_at[order]
+    chat = transitions.chat[order]
+    finished = (
+        (homework_ids[1:] == homework_ids[:-1])
+        & (status[:-1] == REVIEWING)
+        & ((status[1:] == APPROVED) | (status[1:] == REJECTED))
+    )
+    started = np.flatnonzero(finished)
+    return Reviews(chat[started], changed_at[started + 1],
+                   changed_at[started + 1] - changed_at[started],
+                   status[started + 1], transitions.chats)
+
+
+def group_keys(review_set, by):
+    """Ключ группы каждого ревью."""
+    if by == 'cohort':
+        return review_set.chat
+    if by == 'week':
+        return ((review_set.finished_at + WEEK_OFFSET) // WEEK * WEEK
+                - WEEK_OFFSET)
+    return np.zeros(len(review_set.duration), dtype=np.int64)
+
+
+def grouped_percentiles(groups, values, quantiles=PERCENTILES):
+    """Перцентили ``values`` внутри каждой группы.
+
+    Возвращает ключи групп, их размеры и матрицу ``группа x перцентиль``
+    с линейной интерполяцией, как ``np.percentile``.
+    """
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    keys, starts, sizes = np.unique(groups, return_index=True,
+                                    return_counts=True)
+    positions = (sizes[:, None] - 1) * np.asarray(quantiles)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    low = values[starts[:, None] + lower].astype(np.float64)
+    high = values[starts[:, None] + upper].astype(np.float64)
+    return keys, sizes, low + (high - low) * (positions - lower)
+
+
+def rejection_rates(groups, outcomes):
+    """Доля возвратов в каждой группе в порядке ``np.unique(groups)``."""
+    _, inverse = np.unique(groups, return_inverse=True)
+    total = np.bincount(inverse)
+    rejected = np.bincount(inverse, weights=outcomes == REJECTED)
+    return rejected / total
+
+
+def histogram(durations, bins=HISTOGRAM_BINS):
+    """Число ревью по интервалам длительности в часах."""
+    counts, _ = np.histogram(durations / HOUR, bins=bins)
+    return counts
+
+
+def build_report(review_set, by='all'):
+    """Строки отчёта: группа, число ревью, перцентили в часах, возвраты."""
+    if not len(review_set.duration):
+        return []
+    groups = group_keys(review_set, by)
+    keys, sizes, percentiles = grouped_percentiles(groups,
+                                                   review_set.duration)
+    rates = rejection_rates(groups, review_set.outcome)
+    return [
+        {'group': format_group(key, by, review_set.chats),
+         'reviews': int(size),
+         'percentiles_h': [value / HOUR for value in row],
+         'rejected': float(rate)}
+        for key, size, row, rate in zip(keys, sizes, percentiles, rates)
+    ]
+
+
+def format_group(key, by, chats):
+    """Название группы для отчёта."""
+    if by == 'cohort':
+        return str(chats[key])
+    if by == 'week':
+        return time.strftime('%Y-%m-%d', time.gmtime(int(key)))
+    return 'все'
+
+
+def format_report(rows, counts, bins=HISTOGRAM_BINS):
+    """Текст отчёта с таблицей групп и гистограммой."""
+    header = ''.join(f'{f"p{round(q * 100)}, ч":>10}' for q in PERCENTILES)
+    lines = [f'{"группа":<16}{"ревью":>8}{header}{"возвраты":>10}']
+    for row in rows:
+        values = ''.join(f'{value:>10.1f}' for value in row['percentiles_h'])
+        lines.append(f'{row["group"]:<16}{row["reviews"]:>8}{values}'
+                     f'{row["rejected"]:>10.1%}')
+    lines.append('')
+    lines.append('Длительность ревью, ч:')
+    for low, high, count in zip(bins[:-1], bins[1:], counts):
+        label = f'{low:g}–{high:g}' if np.isfinite(high) else f'{low:g}+'
+        lines.append(f'{label:>10}{count:>10}')
+    return '\n'.join(lines)
+
+
+def main():
+    """Разбор аргументов командной строки и печать отчёта."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--state-file', default=os.getenv('STATE_FILE'),
+                        required=not os.getenv('STATE_FILE'))
+    parser.add_argument('--days', type=float, default=None,
+                        help='только ревью за последние N дней')
+    parser.add_argument('--by', choices=GROUPINGS, default='all')
+    args = parser.parse_args()
+    start = 0 if args.days is None else time.time() - args.days * 86400
+    review_set = reviews(load_transitions(args.state_file, start))
+    print(format_report(build_report(review_set, args.by),
+                        histogram(review_set.duration)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Асинхронный режим опроса API домашек.
+
+Запросы к API идут через общий пул соединений ``aiohttp``, отправка в
+Telegram выполняется в потоках, чтобы синхронный ``telegram.Bot`` не
+блокировал цикл событий. Синхронные функции из ``homework`` остаются
+без изменений.
+"""
+import asyncio
+import logging
+import signal
+from http import HTTPStatus
+from sys import stdout
+
+import aiohttp
+import telegram
+from telegram.utils.request import Request
+
+import circuit
+import commands
+import history
+import homework
+import log_pipeline
+import metrics
+import state_store
+import tenants
+from exceptions import (EnvironmentVariableMissing,
+                        NotOkResponseStatusExeption, RequestError)
+
+CONCURRENCY = 50
+REQUEST_TIMEOUT = 30
+
+
+def create_bot(token, concurrency=CONCURRENCY, **kwargs):
+    """Бот с пулом соединений под параллельную отправку из потоков."""
+    return telegram.Bot(token=token,
+                        request=Request(con_pool_size=concurrency), **kwargs)
+
+
+def create_session(concurrency=CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Сессия aiohttp с ограниченным пулом соединений."""
+    connector = aiohttp.TCPConnector(limit=concurrency,
+                                     limit_per_host=concurrency)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+async def async_get_api_answer(session, timestamp, headers=None):
+    """Асинхронный аналог ``get_api_answer``."""
+    headers = homework.HEADERS if headers is None else headers
+    logging.debug('Направляем запрос на %s, параметры: %s',
+                  homework.ENDPOINT, {'from_date': timestamp})
+    with circuit.API.guard():
+        try:
+            with metrics.API_REQUEST_SECONDS.time():
+                async with session.get(
+                        homework.ENDPOINT, headers=headers,
+                        params={'from_date': timestamp}) as answer:
+                    if answer.status != HTTPStatus.OK:
+                        raise NotOkResponseStatusExeption(
+                            answer.status, answer.headers.get('Retry-After'))
+                    return await answer.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError,
+                ValueError) as error:
+            raise RequestError(error)
+
+
+async def async_send_message(bot, chat_id, message):
+    """Асинхронный аналог ``send_message``: отправка в отдельном потоке."""
+    await asyncio.to_thread(homework.send_message_to, bot, chat_id, message)
+
+
+class AsyncPoller:
+    """Опрос тенантов с ограниченным числом одновременных запросов."""
+
+    def __init__(self, bot, tenant_list, period=homework.RETRY_PERIOD,
+                 concurrency=CONCURRENCY, store=None, log=None):
+        """Опрос ``tenant_list`` раз в ``period`` секунд."""
+        self.bot = bot
+        self.store = state_store.NullStore() if store is None else store
+        self.log = history.NullLog() if log is None else log
+        self.tenants = tenant_list
+        self.period = period
+        self.concurrency = concurrency
+        self.stopping = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll_tenant(self, session, tenant):
+        """Асинхронный цикл опроса одного тенанта.
+
+        Состояние тенанта меняется под ``tenant.lock``, как в
+        ``tenants.process_answer``: его читают команды бота из потоков
+        ``Updater``.
+        """
+        if tenant.paused:
+            return
+        async with self._semaphore:
+            with metrics.POLL_CYCLE_SECONDS.time():
+                try:
+                    response = await async_get_api_answer(
+                        session, tenant.timestamp, tenant.headers)
+                except Exception as error:
+                    response = error
+                with tenant.lock:
+                    try:
+                        if isinstance(response, Exception):
+                            raise response
+                        messages = tenants.handle_response(tenant, response,
+                                                           self.log)
+                    except Exception as error:
+                        messages = tenants.handle_error(tenant, error)
+            for message in messages:
+                await async_send_message(self.bot, tenant.chat_id, message)
+            tenants.checkpoint(self.store, tenant)
+
+    async def run_cycle(self, session):
+        """Один проход по всем тенантам."""
+        await asyncio.gather(
+            *(self.poll_tenant(session, tenant) for tenant in self.tenants)
+        )
+
+    async def run(self):
+        """Цикл опроса до вызова ``stop``.
+
+        После ``stop`` начатый проход доводится до конца, поэтому
+        остановка не теряет уже полученные статусы. При отмене задачи
+        незавершённые запросы отменяются, а сессия закрывается.
+        """
+        async with create_session(self.concurrency) as session:
+            while not self.stopping.is_set():
+                await self.run_cycle(session)
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.period)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self):
+        """Запрос на остановку после текущего прохода."""
+        self.stopping.set()
+
+
+async def run(bot, tenant_list, store=None, log=None):
+    """Запуск опроса с остановкой по SIGINT и SIGTERM."""
+    poller = AsyncPoller(bot, tenant_list, store=store, log=log)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, poller.stop)
+    await poller.run()
+
+
+def main():
+    """Асинхронный запуск опроса для всех тенантов реестра."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Отсустсвует обязательная переменная окружения '
+                         'TELEGRAM_TOKEN')
+        raise EnvironmentVariableMissing('TELEGRAM_TOKEN')
+
+    tenant_list = tenants.load_tenants()
+    metrics.start_server_from_env()
+    store = state_store.open_store(tenants.STATE_FILE)
+    log = history.open_log(tenants.STATE_FILE)
+    tenants.restore_state(store, tenant_list)
+    bot = create_bot(homework.TELEGRAM_TOKEN)
+    command_bot = commands.start_from_env(tenant_list,
+                                          homework.TELEGRAM_TOKEN)
+    try:
+        asyncio.run(run(bot, tenant_list, store, log))
+    finally:
+        if command_bot is not None:
+            command_bot.stop()
+        log.close()
+        store.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=log_pipeline.LOG_LEVEL,
+        handlers=log_pipeline.handlers(stdout),
+    )
+
+    main()
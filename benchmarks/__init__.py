@@ -0,0 +1 @@
+"""Офлайн-замеры производительности бота на локальных заглушках API."""
@@ -0,0 +1,151 @@
+"""Локальные заглушки API Практикума и Telegram Bot API."""
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+# Замеры подменяют time.sleep, а задержка заглушки должна оставаться
+# настоящей.
+_sleep = time.sleep
+
+
+def make_payload(payload_size, shift=0):
+    """Ответ API с ``payload_size`` домашками; ``shift`` сдвигает статусы."""
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'student__hw{number:02}.zip',
+                'lesson_name': f'Спринт {number}',
+                'reviewer_comment': 'Комментарий ревьюера. ' * 5,
+                'date_updated': '2026-01-01T00:00:00Z',
+                'status': STATUSES[(number + shift) % len(STATUSES)],
+            }
+            for number in range(payload_size, 0, -1)
+        ],
+        'current_date': int(time.time()),
+    }
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _PracticumHandler(_JsonHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            _sleep(server.latency)
+        if server.random.random() < server.error_rate:
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        self.send_json(HTTPStatus.OK, server.payload())
+
+
+class _TelegramHandler(_JsonHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        message_id = self.server.count_request()
+        self.send_json(HTTPStatus.OK, {
+            'ok': True,
+            'result': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': 1, 'type': 'private'},
+                'text': '',
+            },
+        })
+
+
+class FakeServer(ThreadingHTTPServer):
+    """HTTP-сервер в фоновом потоке со счётчиком запросов."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler):
+        """Сервер на свободном порту локального интерфейса."""
+        super().__init__(('127.0.0.1', 0), handler)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={'poll_interval': 0.05},
+            daemon=True,
+        )
+
+    @property
+    def url(self):
+        """Адрес сервера."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def count_request(self):
+        """Учёт запроса; возвращает его номер."""
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def __enter__(self):
+        """Запуск сервера в фоновом потоке."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Остановка сервера и закрытие сокета."""
+        self.shutdown()
+        self.server_close()
+
+
+class FakePracticumAPI(FakeServer):
+    """Заглушка ``ENDPOINT``.
+
+    ``latency`` — задержка ответа в секундах, ``error_rate`` — доля
+    ответов с кодом 500, ``payload_size`` — число домашек в ответе.
+    Статусы домашек меняются с каждым запросом, чтобы бот отправлял
+    сообщения.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, payload_size=1, seed=0):
+        """Заглушка с задержкой, долей ошибок и размером ответа."""
+        super().__init__(_PracticumHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.random = random.Random(seed)
+
+    def payload(self):
+        """Тело успешного ответа."""
+        return make_payload(self.payload_size, shift=self.requests)
+
+
+class FakeTelegramAPI(FakeServer):
+    """Заглушка Telegram Bot API, отвечающая на любой метод успехом."""
+
+    def __init__(self):
+        """Заглушка без задержек и ошибок."""
+        super().__init__(_TelegramHandler)
+
+    @property
+    def base_url(self):
+        """Значение ``base_url`` для ``telegram.Bot``."""
+        return f'{self.url}bot'
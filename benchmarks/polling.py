@@ -0,0 +1,220 @@
+"""Замер пропускной способности циклов опроса.
+
+Запуск::
+
+    python -m benchmarks.polling --tenants 100 --cycles 5 --latency 0.05
+
+Для каждого движка печатается число опросов в секунду, p50/p99
+длительности цикла опроса одного тенанта и расход памяти на тенанта.
+"""
+import argparse
+import asyncio
+import functools
+import gc
+import logging
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+import telegram
+
+import async_homework
+import homework
+import tenants
+from benchmarks.fake_services import (FakePracticumAPI, FakeTelegramAPI,
+                                      make_payload)
+
+
+class StopBenchmark(BaseException):
+    """Остановка бесконечного цикла ``main`` после нужного числа циклов."""
+
+
+@contextmanager
+def patched(target, name, value):
+    """Временная подмена атрибута."""
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированной выборке."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def make_tenants(count):
+    """Тенанты с разными токенами и чатами."""
+    return [tenants.Tenant(f'tenant{number}', f'token{number}', number)
+            for number in range(count)]
+
+
+def report(engine, latencies, elapsed, memory_per_tenant=None):
+    """Строка с результатами движка."""
+    polls = len(latencies)
+    return {
+        'engine': engine,
+        'polls': polls,
+        'polls_per_sec': polls / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'memory_per_tenant_bytes': memory_per_tenant,
+    }
+
+
+def bench_main(api, telegram_api, cycles):
+    """Замер исходного цикла ``homework.main``."""
+    marks = [time.perf_counter()]
+
+    def fake_sleep(seconds):
+        marks.append(time.perf_counter())
+        if len(marks) > cycles:
+            raise StopBenchmark
+
+    bot_factory = functools.partial(telegram.Bot,
+                                    base_url=telegram_api.base_url)
+    with ExitStack() as stack:
+        for name, value in (('ENDPOINT', api.url), ('STATE_FILE', None),
+                            ('PRACTICUM_TOKEN', 'token'),
+                            ('TELEGRAM_TOKEN', '1234:abcdefg'),
+                            ('TELEGRAM_CHAT_ID', '1')):
+            stack.enter_context(patched(homework, name, value))
+        stack.enter_context(patched(telegram, 'Bot', bot_factory))
+        stack.enter_context(patched(time, 'sleep', fake_sleep))
+        try:
+            homework.main()
+        except StopBenchmark:
+            pass
+
+    latencies = [end - start for start, end in zip(marks, marks[1:])]
+    return report('main', latencies, marks[-1] - marks[0])
+
+
+def tenant_memory(count, payload_size):
+    """Память на одного тенанта с заполненным трекером статусов."""
+    homeworks = make_payload(payload_size)['homeworks']
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tenant_list = make_tenants(count)
+    for tenant in tenant_list:
+        tenant.tracker.update(homeworks)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'lineno'))
+    return used / count
+
+
+def bench_tenants(api, telegram_api, tenant_count, cycles, payload_size):
+    """Замер синхронного мультитенантного движка."""
+    bot = telegram.Bot(token='1234:abcdefg', base_url=telegram_api.base_url)
+    tenant_list = make_tenants(tenant_count)
+    latencies = []
+    with patched(homework, 'ENDPOINT', api.url):
+        started = time.perf_counter()
+        for _ in range(cycles):
+            for tenant in tenant_list:
+                poll_started = time.perf_counter()
+                tenants.poll_tenant(bot, tenant)
+                latencies.append(time.perf_counter() - poll_started)
+        elapsed = time.perf_counter() - started
+    return report('tenants', latencies, elapsed,
+                  tenant_memory(tenant_count, payload_size))
+
+
+def bench_async(api, telegram_api, tenant_count, cycles, concurrency):
+    """Замер асинхронного движка."""
+    bot = async_homework.create_bot('1234:abcdefg', concurrency,
+                                    base_url=telegram_api.base_url)
+    tenant_list = make_tenants(tenant_count)
+    latencies = []
+
+    async def run():
+        poller = async_homework.AsyncPoller(bot, tenant_list,
+                                            concurrency=concurrency)
+        original = poller.poll_tenant
+
+        async def timed_poll(session, tenant):
+            poll_started = time.perf_counter()
+            await original(session, tenant)
+            latencies.append(time.perf_counter() - poll_started)
+
+        poller.poll_tenant = timed_poll
+        async with async_homework.create_session(concurrency) as session:
+            for _ in range(cycles):
+                await poller.run_cycle(session)
+
+    with patched(homework, 'ENDPOINT', api.url):
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+    return report('async', latencies, elapsed)
+
+
+ENGINES = ('main', 'tenants', 'async')
+
+
+def run_benchmarks(engines=ENGINES, tenant_count=10, cycles=3, latency=0.0,
+                   error_rate=0.0, payload_size=1, concurrency=50):
+    """Запуск выбранных движков на свежих заглушках."""
+    results = []
+    for engine in engines:
+        with FakePracticumAPI(latency, error_rate, payload_size) as api, \
+                FakeTelegramAPI() as telegram_api:
+            if engine == 'main':
+                result = bench_main(api, telegram_api, cycles)
+            elif engine == 'tenants':
+                result = bench_tenants(api, telegram_api, tenant_count,
+                                       cycles, payload_size)
+            else:
+                result = bench_async(api, telegram_api, tenant_count,
+                                     cycles, concurrency)
+            result['api_requests'] = api.requests
+            result['telegram_requests'] = telegram_api.requests
+            results.append(result)
+    return results
+
+
+def format_results(results):
+    """Таблица результатов."""
+    lines = [f'{"engine":<10}{"polls":>8}{"polls/s":>10}{"p50 ms":>10}'
+             f'{"p99 ms":>10}{"B/tenant":>10}']
+    for result in results:
+        memory = result['memory_per_tenant_bytes']
+        lines.append(
+            f'{result["engine"]:<10}{result["polls"]:>8}'
+            f'{result["polls_per_sec"]:>10.1f}{result["p50_ms"]:>10.2f}'
+            f'{result["p99_ms"]:>10.2f}'
+            f'{"-" if memory is None else int(memory):>10}'
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    """Разбор аргументов командной строки и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engines', nargs='+', choices=ENGINES,
+                        default=list(ENGINES))
+    parser.add_argument('--tenants', type=int, default=10)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = run_benchmarks(args.engines, args.tenants, args.cycles,
+                             args.latency, args.error_rate,
+                             args.payload_size, args.concurrency)
+    print(format_results(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Замер времени импорта модулей бота.
+
+Запуск::
+
+    python -m benchmarks.startup --modules homework tenants --repeat 5
+
+Каждый модуль импортируется в отдельном интерпретаторе с
+``-X importtime``. Печатается лучшее время импорта модуля, время с
+догрузкой отложенных зависимостей (``requests`` и ``telegram``, см.
+``lazy``) и самые долгие пакеты в собственном времени импорта.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ('requests', 'telegram')
+
+
+def parse_importtime(output):
+    """Строки ``-X importtime``: {пакет: (своё время, общее время)}, мкс."""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        timings[name.strip()] = (int(own), int(cumulative))
+    return timings
+
+
+def import_timings(code):
+    """Время импорта всех пакетов при выполнении ``code``, мкс."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def total(timings, base):
+    """Собственное время импорта пакетов, которых нет в ``base``, мкс."""
+    return sum(own for name, (own, _) in timings.items() if name not in base)
+
+
+def measure(module, repeat=5):
+    """Лучшее время импорта модуля и импорта с догрузкой зависимостей.
+
+    Пакеты, которые импортирует сам интерпретатор при запуске, не
+    учитываются.
+    """
+    deferred = '; '.join(f'import {name}' for name in DEFERRED)
+    best_lazy = best_full = None
+    slowest = {}
+    for _ in range(repeat):
+        base = import_timings('import site')
+        timings = import_timings(f'import {module}')
+        lazy = total(timings, base)
+        full = total(import_timings(f'import {module}; {deferred}'), base)
+        if best_lazy is None or lazy < best_lazy:
+            best_lazy = lazy
+            slowest = {name: value for name, value in timings.items()
+                       if name not in base}
+        best_full = full if best_full is None else min(best_full, full)
+    top = sorted(((own, name) for name, (own, _) in slowest.items()),
+                 reverse=True)[:5]
+    return {'module': module, 'import_ms': best_lazy / 1000,
+            'with_deferred_ms': best_full / 1000,
+            'slowest': [(name, own / 1000) for own, name in top]}
+
+
+def run_benchmarks(modules=('homework',), repeat=5):
+    """Замеры для каждого модуля."""
+    return [measure(module, repeat) for module in modules]
+
+
+def format_results(results):
+    """Таблица результатов."""
+    lines = [f'{"module":<16}{"import, ms":>12}{"+deferred, ms":>15}']
+    for result in results:
+        lines.append(f'{result["module"]:<16}{result["import_ms"]:>12.1f}'
+                     f'{result["with_deferred_ms"]:>15.1f}')
+        lines.extend(f'    {name:<28}{own:>8.1f}'
+                     for name, own in result['slowest'])
+    return '\n'.join(lines)
+
+
+def main():
+    """Разбор аргументов командной строки и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=['homework'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(format_results(run_benchmarks(args.modules, args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Замер стоимости проверки ответа API и разбора статусов.
+
+Запуск::
+
+    python -m benchmarks.validation --payload-size 5 --number 20000
+
+Сравниваются прежние ``check_response``/``parse_status`` (копии ниже)
+и текущие функции из ``homework``, работающие через ``schema``.
+Печатается время обработки одного ответа в наносекундах.
+"""
+import argparse
+import timeit
+
+import homework
+from benchmarks.fake_services import make_payload
+from exceptions import EmptyResponseAPI
+
+
+def legacy_check_response(response):
+    """``check_response`` до перехода на скомпилированную схему."""
+    must_have_keys = ('homeworks', 'current_date')
+    if not isinstance(response, dict):
+        raise TypeError('dict')
+    for key in must_have_keys:
+        if key not in response:
+            raise EmptyResponseAPI(key)
+    response_homeworks = response.get('homeworks')
+    if not isinstance(response_homeworks, list):
+        raise TypeError('list')
+    return response_homeworks
+
+
+def legacy_parse_status(homework_data):
+    """``parse_status`` до перехода на скомпилированную схему."""
+    status = homework_data.get('status')
+    if not status:
+        raise KeyError('status')
+    homework_name = homework_data.get('homework_name')
+    if not homework_name:
+        raise KeyError('homework_name')
+    verdict = homework.HOMEWORK_VERDICTS.get(status)
+    if not verdict:
+        raise KeyError(status)
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def process(check, parse, response):
+    """Проверка ответа и сообщения по всем домашкам."""
+    return [parse(item) for item in check(response)]
+
+
+def measure(variants, response, number, repeat=7):
+    """Лучшее время обработки одного ответа для каждого варианта, нс.
+
+    Замеры вариантов чередуются, чтобы фоновая нагрузка влияла на них
+    одинаково.
+    """
+    timers = [timeit.Timer(lambda check=check, parse=parse: process(
+        check, parse, response)) for check, parse in variants]
+    best = [float('inf')] * len(timers)
+    for _ in range(repeat):
+        for index, timer in enumerate(timers):
+            best[index] = min(best[index], timer.timeit(number))
+    return [elapsed / number * 1e9 for elapsed in best]
+
+
+def run_benchmarks(payload_size=5, number=20000):
+    """Время на ответ для прежней и текущей реализации."""
+    response = make_payload(payload_size)
+    assert (process(legacy_check_response, legacy_parse_status, response)
+            == process(homework.check_response, homework.parse_status,
+                       response))
+    legacy, compiled = measure(
+        [(legacy_check_response, legacy_parse_status),
+         (homework.check_response, homework.parse_status)],
+        response, number,
+    )
+    return {'legacy_ns': legacy, 'compiled_ns': compiled,
+            'speedup': legacy / compiled if compiled else 0.0}
+
+
+def main():
+    """Разбор аргументов командной строки и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payload-size', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+    result = run_benchmarks(args.payload_size, args.number)
+    print(f'legacy:   {result["legacy_ns"]:.0f} ns/ответ\n'
+          f'compiled: {result["compiled_ns"]:.0f} ns/ответ\n'
+          f'speedup:  x{result["speedup"]:.2f}')
+
+
+if __name__ == '__main__':
+    main()
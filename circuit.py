@@ -0,0 +1,144 @@
+"""Предохранители для API Практикума и Telegram.
+
+После ``CIRCUIT_FAILURE_THRESHOLD`` сбоев подряд предохранитель
+размыкается: обращения к сервису сразу завершаются ``CircuitOpenError``
+без запроса. Через ``CIRCUIT_RESET_TIMEOUT`` секунд пропускается
+пробный запрос; если он успешен, предохранитель замыкается, иначе снова
+размыкается. Предохранители общие для всех тенантов процесса.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import lazy
+import metrics
+from exceptions import (CircuitOpenError, NotOkResponseStatusExeption,
+                        RequestError)
+
+telegram = lazy.LazyModule('telegram')
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 60))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def is_api_failure(error):
+    """Сбой API: ошибка соединения, 5xx или 429."""
+    if isinstance(error, RequestError):
+        return True
+    return isinstance(error, NotOkResponseStatusExeption) and (
+        error.status == HTTPStatus.TOO_MANY_REQUESTS or error.status >= 500
+    )
+
+
+def is_telegram_failure(error):
+    """Сбой Telegram: сетевая ошибка, но не ошибка в самом запросе."""
+    return (isinstance(error, telegram.error.NetworkError)
+            and not isinstance(error, telegram.error.BadRequest))
+
+
+class CircuitBreaker:
+    """Предохранитель с состояниями closed, open и half-open."""
+
+    def __init__(self, name, is_failure,
+                 failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_RESET_TIMEOUT, half_open_calls=1,
+                 clock=time.monotonic):
+        """Предохранитель ``name``; ``is_failure`` отличает сбои от ошибок."""
+        self.name = name
+        self.is_failure = is_failure
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    @property
+    def retry_at(self):
+        """Момент по ``clock``, когда будет пропущен пробный запрос."""
+        if self.state != OPEN:
+            return self.clock()
+        return self.opened_at + self.reset_timeout
+
+    def before_call(self):
+        """Разрешение на запрос или ``CircuitOpenError``."""
+        with self._lock:
+            now = self.clock()
+            if self.state == OPEN:
+                if now < self.opened_at + self.reset_timeout:
+                    raise CircuitOpenError(
+                        self.name, self.opened_at + self.reset_timeout - now)
+                self.state = HALF_OPEN
+                self._trials = 0
+                logging.info('Предохранитель %s: пробный запрос', self.name)
+            if self.state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    raise CircuitOpenError(self.name, 0)
+                self._trials += 1
+
+    def record_success(self):
+        """Учёт успешного запроса."""
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info('Предохранитель %s замкнут', self.name)
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Учёт сбоя сервиса."""
+        with self._lock:
+            self.failures += 1
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    logging.error('Предохранитель %s разомкнут на %s с',
+                                  self.name, self.reset_timeout)
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    @contextmanager
+    def guard(self):
+        """Запрос под защитой предохранителя.
+
+        Исключения, которые ``is_failure`` не считает сбоем сервиса
+        (например, 404 или ошибка в данных), учитываются как успех:
+        сервис отвечает.
+        """
+        self.before_call()
+        try:
+            yield
+        except Exception as error:
+            if self.is_failure(error):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+
+
+API = CircuitBreaker('practicum_api', is_api_failure)
+TELEGRAM = CircuitBreaker('telegram', is_telegram_failure)
+
+
+def _register_state_gauge(breaker):
+    gauge = metrics.REGISTRY.register(metrics.Gauge(
+        f'homework_{breaker.name}_circuit_state',
+        f'Предохранитель {breaker.name}: 0 — замкнут, 1 — пробный запрос, '
+        '2 — разомкнут.',
+    ))
+    gauge.set_function(lambda: STATE_CODES[breaker.state])
+
+
+_register_state_gauge(API)
+_register_state_gauge(TELEGRAM)
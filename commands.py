@@ -0,0 +1,120 @@
+"""Команды бота: ``/status``, ``/history``, ``/pause`` и ``/resume``.
+
+Ответы строятся по состоянию тенантов в памяти процесса, API домашек
+при этом не запрашивается. Обновления Telegram читаются long polling'ом
+в собственных потоках ``Updater``, поэтому команды не задерживают цикл
+опроса, а цикл опроса не задерживает ответы на команды.
+"""
+import logging
+import os
+from datetime import datetime
+
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '').lower() in ('1', 'true', 'yes')
+COMMAND_WORKERS = 2
+UNKNOWN_CHAT = 'Этот чат не подписан на статусы домашек.'
+
+
+def format_time(timestamp):
+    """Дата и время по unix-времени."""
+    if not timestamp:
+        return 'ещё не было'
+    return datetime.fromtimestamp(timestamp).strftime('%d.%m.%Y %H:%M')
+
+
+def format_status(tenant):
+    """Текст ответа на ``/status``."""
+    lines = [f'Последняя проверка: {format_time(tenant.timestamp)}']
+    if tenant.paused:
+        lines.append('Опрос приостановлен, /resume — возобновить.')
+    if tenant.old_status:
+        lines.append(tenant.old_status)
+    statuses = tenant.tracker.statuses
+    if not statuses:
+        lines.append('Статусов домашек пока нет.')
+    for key, status in sorted(statuses.items()):
+        lines.append(f'{key}: {status}')
+    return '\n'.join(lines)
+
+
+def format_history(tenant):
+    """Текст ответа на ``/history``."""
+    if not tenant.history:
+        return 'Изменений статусов пока не было.'
+    return '\n'.join(f'{format_time(changed_at)} — {message}'
+                     for changed_at, message in tenant.history)
+
+
+def pause(tenant):
+    """Приостановка опроса тенанта."""
+    tenant.paused = True
+    return 'Опрос приостановлен, /resume — возобновить.'
+
+
+def resume(tenant):
+    """Возобновление опроса тенанта."""
+    tenant.paused = False
+    return ('Опрос возобновлён. Изменения за время паузы придут '
+            'со следующей проверкой.')
+
+
+COMMANDS = {
+    'status': format_status,
+    'history': format_history,
+    'pause': pause,
+    'resume': resume,
+}
+
+
+class CommandBot:
+    """Обработчик команд поверх ``telegram.ext.Updater``.
+
+    У ``Updater`` свой пул соединений: long polling ``getUpdates``
+    не занимает соединение бота, который рассылает уведомления.
+    """
+
+    def __init__(self, tenant_list, token, workers=COMMAND_WORKERS):
+        """Обработчики команд для ``tenant_list`` у бота с ``token``."""
+        # telegram.ext импортируется, только если команды включены.
+        from telegram.ext import CommandHandler, Updater
+
+        self.set_tenants(tenant_list)
+        self.updater = Updater(token=token, workers=workers)
+        for name, action in COMMANDS.items():
+            self.updater.dispatcher.add_handler(
+                CommandHandler(name, self.make_callback(action)))
+
+    def set_tenants(self, tenant_list):
+        """Замена списка тенантов, например после перезагрузки."""
+        self.tenants = {str(tenant.chat_id): tenant for tenant in tenant_list}
+
+    def answer(self, chat_id, action):
+        """Ответ на команду из чата ``chat_id``."""
+        tenant = self.tenants.get(str(chat_id))
+        if tenant is None:
+            return UNKNOWN_CHAT
+        with tenant.lock:
+            return action(tenant)
+
+    def make_callback(self, action):
+        """Callback ``CommandHandler`` для команды."""
+        def callback(update, context):
+            update.effective_message.reply_text(
+                self.answer(update.effective_chat.id, action))
+        return callback
+
+    def start(self):
+        """Запуск long polling в фоновых потоках."""
+        self.updater.start_polling()
+        logging.info('Команды бота принимаются')
+        return self
+
+    def stop(self):
+        """Остановка long polling."""
+        self.updater.stop()
+
+
+def start_from_env(tenant_list, token):
+    """Запуск обработчика команд, если задан ``BOT_COMMANDS``."""
+    if not BOT_COMMANDS:
+        return None
+    return CommandBot(tenant_list, token).start()
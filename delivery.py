@@ -0,0 +1,239 @@
+"""Очередь отправки сообщений в Telegram.
+
+Сообщения для одного чата, накопившиеся к моменту отправки, склеиваются
+в одно. Частота отправки ограничивается token bucket'ами: общим для бота
+и отдельным для каждого чата. Отправка идёт в отдельном потоке, поэтому
+цикл опроса не ждёт Telegram.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import circuit
+import lazy
+import metrics
+from exceptions import CircuitOpenError
+
+telegram = lazy.LazyModule('telegram')
+
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Ограничитель частоты: ``rate`` событий в секунду, запас ``capacity``."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate, capacity, now):
+        """Полное ведро: ``capacity`` токенов, ``rate`` в секунду."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now):
+        """Сколько секунд ждать до появления токена."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        """Списание токена."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+def coalesce(messages, limit=MAX_MESSAGE_LENGTH):
+    """Склейка сообщений в куски не длиннее ``limit`` символов."""
+    chunks = []
+    current = ''
+    for message in messages:
+        candidate = f'{current}{SEPARATOR}{message}' if current else message
+        if current and len(candidate) > limit:
+            chunks.append(current)
+            candidate = message
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DeliveryQueue:
+    """Очередь отправки сообщений с рабочим потоком.
+
+    ``RetryAfter`` и ``NetworkError`` повторяются с экспоненциальной
+    паузой до ``max_retries`` раз, остальные ``TelegramError`` — нет.
+    Пока предохранитель Telegram разомкнут, сообщения ждут в очереди
+    и попытки не расходуют.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+                 max_retries=MAX_RETRIES, retry_backoff=RETRY_BACKOFF,
+                 clock=time.monotonic):
+        """Очередь с общим лимитом и лимитом на каждый чат."""
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.clock = clock
+        self._pending = OrderedDict()
+        self._attempts = {}
+        self._chat_buckets = {}
+        self._ready_at = {}
+        self._global_bucket = TokenBucket(global_rate, global_rate, clock())
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def depth(self):
+        """Число сообщений, ожидающих отправки."""
+        with self._condition:
+            return sum(map(len, self._pending.values())) + self._in_flight
+
+    def put(self, chat_id, message):
+        """Постановка сообщения в очередь."""
+        with self._condition:
+            self._pending.setdefault(chat_id, []).append(message)
+            self._condition.notify()
+
+    def start(self):
+        """Запуск рабочего потока."""
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='telegram-delivery')
+        self._thread.start()
+        metrics.DELIVERY_QUEUE_DEPTH.set_function(lambda: self.depth)
+        return self
+
+    def flush(self, timeout=None):
+        """Ожидание отправки всех сообщений; True, если очередь пуста."""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else (
+                    deadline - self.clock())
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def stop(self, timeout=None):
+        """Отправка оставшихся сообщений и остановка рабочего потока."""
+        drained = self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return drained
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, 1, now)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _next_chat(self, now):
+        """Чат, которому можно отправлять сейчас, или время ожидания."""
+        wait = None
+        global_wait = self._global_bucket.wait_time(now)
+        for chat_id in self._pending:
+            chat_wait = max(
+                self._chat_bucket(chat_id, now).wait_time(now),
+                self._ready_at.get(chat_id, now) - now,
+                global_wait,
+            )
+            if chat_wait <= 0:
+                return chat_id, 0
+            wait = chat_wait if wait is None else min(wait, chat_wait)
+        return None, wait
+
+    def _take(self):
+        """Следующая пачка сообщений для отправки или None при остановке."""
+        with self._condition:
+            while True:
+                if self._stopping and not self._pending:
+                    return None
+                now = self.clock()
+                chat_id, wait = self._next_chat(now)
+                if chat_id is not None:
+                    messages = self._pending.pop(chat_id)
+                    self._ready_at.pop(chat_id, None)
+                    self._chat_bucket(chat_id, now).consume(now)
+                    self._global_bucket.consume(now)
+                    self._in_flight += len(messages)
+                    return chat_id, messages
+                self._condition.wait(wait)
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            chat_id, messages = batch
+            try:
+                self._deliver(chat_id, messages)
+            finally:
+                with self._condition:
+                    self._in_flight -= len(messages)
+                    self._condition.notify_all()
+
+    def _deliver(self, chat_id, messages):
+        chunks = coalesce(messages)
+        for number, text in enumerate(chunks):
+            try:
+                with circuit.TELEGRAM.guard(), \
+                        metrics.TELEGRAM_SEND_SECONDS.time():
+                    self.bot.send_message(chat_id, text)
+                logging.debug('Сообщение в телеграм-чат отправлено')
+            except CircuitOpenError as error:
+                self._postpone(chat_id, chunks[number:],
+                               max(error.retry_after, self.retry_backoff))
+                return
+            except telegram.error.RetryAfter as error:
+                self._retry(chat_id, chunks[number:], error,
+                            error.retry_after)
+                return
+            except telegram.error.NetworkError as error:
+                self._retry(chat_id, chunks[number:], error)
+                return
+            except telegram.error.TelegramError as error:
+                metrics.count_error(error)
+                logging.error('Сбой в отправке сообщения ботом: %s', error)
+        self._attempts.pop(chat_id, None)
+
+    def _retry(self, chat_id, chunks, error, retry_after=None):
+        attempt = self._attempts.get(chat_id, 0) + 1
+        if attempt > self.max_retries:
+            self._attempts.pop(chat_id, None)
+            metrics.count_error(error)
+            logging.error('Сбой в отправке сообщения ботом: %s', error)
+            return
+        self._attempts[chat_id] = attempt
+        delay = self.retry_backoff * 2 ** (attempt - 1)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        logging.warning('Повтор отправки в чат %s через %s с', chat_id, delay)
+        self._postpone(chat_id, chunks, delay)
+
+    def _postpone(self, chat_id, chunks, delay):
+        """Возврат сообщений в начало очереди с паузой для чата."""
+        with self._condition:
+            pending = self._pending.pop(chat_id, [])
+            self._pending[chat_id] = chunks + pending
+            self._pending.move_to_end(chat_id, last=False)
+            self._ready_at[chat_id] = self.clock() + delay
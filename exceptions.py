@@ -26,7 +26,9 @@ class NotOkResponseStatusExeption(Exception):
 
     excepted_status = HTTPStatus.OK
     
-    def __init__(self, got_status):
+    def __init__(self, got_status, retry_after=None):
+        self.status = got_status
+        self.retry_after = retry_after
         self.msg = (f'При отправке запроса к API '
                     f'ожидался статус {self.excepted_status}\n'
                     f'Получен статус {got_status}')
@@ -43,3 +45,26 @@ class RequestError(Exception):
 
     def __str__(self):
         return self.msg
+
+
+class TenantConfigError(Exception):
+    """Исключение при ошибке в описании списка студентов."""
+
+    def __init__(self, error):
+        self.msg = f'Некорректная конфигурация тенантов.\n{error}'
+
+    def __str__(self):
+        return self.msg
+
+
+class CircuitOpenError(Exception):
+    """Исключение при обращении к сервису с разомкнутым предохранителем."""
+
+    def __init__(self, service, retry_after):
+        self.service = service
+        self.retry_after = retry_after
+        self.msg = (f'Сервис {service} временно недоступен, '
+                    f'повтор через {retry_after:.0f} с')
+
+    def __str__(self):
+        return self.msg
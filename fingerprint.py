@@ -0,0 +1,132 @@
+"""Кэш ответов API по отпечатку тела.
+
+Ответ API отличается от предыдущего только полем ``current_date``, если
+статусы домашек не менялись. Поэтому отпечаток считается по сырым байтам
+тела без значения ``current_date``, а само значение достаётся регулярным
+выражением. Если отпечаток совпал, JSON не разбирается: возвращается
+ранее разобранный список домашек с новым ``current_date``. Изменения
+статусов в таком ответе ищутся как обычно: кэш общий для всех, кто
+опрашивает API с тем же токеном, а предыдущая обработка ответа могла
+прерваться ошибкой.
+
+Если API присылает ``ETag`` или ``Last-Modified``, следующий запрос
+становится условным, и ответ ``304 Not Modified`` обрабатывается так же.
+"""
+import hashlib
+import re
+import threading
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+
+class CachedResponse(dict):
+    """Ответ API, восстановленный из кэша без разбора JSON."""
+
+    unchanged = True
+
+
+def is_unchanged(response):
+    """Признак ответа, совпавшего с предыдущим."""
+    return getattr(response, 'unchanged', False)
+
+
+def digest(content):
+    """Отпечаток тела ответа без значения ``current_date``.
+
+    Возвращает пару ``(отпечаток, current_date)``; ``current_date``
+    равен None, если поле не найдено.
+    """
+    match = CURRENT_DATE.search(content)
+    hasher = hashlib.blake2b(digest_size=16)
+    if match is None:
+        hasher.update(content)
+        return hasher.digest(), None
+    hasher.update(content[:match.start(1)])
+    hasher.update(content[match.end(1):])
+    return hasher.digest(), int(match.group(1))
+
+
+class _Entry:
+    __slots__ = ('digest', 'homeworks', 'current_date', 'etag',
+                 'last_modified')
+
+    def __init__(self, digest, homeworks, current_date, etag, last_modified):
+        self.digest = digest
+        self.homeworks = homeworks
+        self.current_date = current_date
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """Последний ответ API для каждого токена."""
+
+    def __init__(self):
+        """Пустой кэш."""
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(headers):
+        """Ключ кэша — заголовок авторизации."""
+        return headers.get('Authorization')
+
+    def conditional_headers(self, key):
+        """Заголовки условного запроса по сохранённым валидаторам."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, key):
+        """Ответ на ``304 Not Modified`` или None, если кэша нет."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        return CachedResponse(homeworks=entry.homeworks,
+                              current_date=entry.current_date)
+
+    def match(self, key, answer):
+        """Ответ из кэша, если тело совпало с предыдущим, иначе None."""
+        content = getattr(answer, 'content', None)
+        entry = self._entries.get(key)
+        if not isinstance(content, bytes) or entry is None:
+            self.misses += 1
+            return None
+        body_digest, current_date = digest(content)
+        if body_digest != entry.digest or current_date is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.current_date = current_date
+        return CachedResponse(homeworks=entry.homeworks,
+                              current_date=current_date)
+
+    def store(self, key, answer, response):
+        """Сохранение разобранного ответа."""
+        content = getattr(answer, 'content', None)
+        if not isinstance(content, bytes) or not isinstance(response, dict):
+            return
+        homeworks = response.get('homeworks')
+        if not isinstance(homeworks, list):
+            return
+        headers = getattr(answer, 'headers', None) or {}
+        body_digest, current_date = digest(content)
+        with self._lock:
+            self._entries[key] = _Entry(
+                body_digest, homeworks, current_date,
+                headers.get('ETag'), headers.get('Last-Modified'),
+            )
+
+    def clear(self):
+        """Очистка кэша."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,170 @@
+"""Журнал смен статусов домашек.
+
+Каждая найденная смена статуса дописывается в таблицу ``transitions``;
+записи не изменяются и не удаляются. Журнал отвечает на вопросы вроде
+«сколько длилось ревью», не запрашивая у API всю историю заново:
+
+- ``timeline(chat_id, homework)`` — все смены статуса домашки по
+  времени;
+- ``between(start, end)`` — смены за период, по всем чатам или по
+  одному, потоком без загрузки всего результата в память.
+
+Оба запроса идут по индексам, поэтому их время зависит от размера
+ответа, а не журнала. Время смены берётся из ``date_updated`` домашки,
+а если его нет — из момента обнаружения. Повторно найденная смена
+(например, после перезапуска без контрольной точки) второй записи не
+создаёт. Каждая запись фиксируется сразу, как в ``state_store``: журнал
+делит файл с контрольными точками и не должен держать блокировку
+записи между циклами опроса.
+"""
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from state_store import BUSY_TIMEOUT
+from tracker import homework_key
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS transitions (
+        id INTEGER PRIMARY KEY,
+        chat_id TEXT NOT NULL,
+        homework TEXT NOT NULL,
+        homework_name TEXT,
+        old_status TEXT,
+        status TEXT NOT NULL,
+        changed_at INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE UNIQUE INDEX IF NOT EXISTS transitions_homework
+    ON transitions (chat_id, homework, changed_at, status)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS transitions_time
+    ON transitions (changed_at)
+    ''',
+)
+INSERT = '''
+INSERT OR IGNORE INTO transitions
+    (chat_id, homework, homework_name, old_status, status, changed_at)
+VALUES (?, ?, ?, ?, ?, ?)
+'''
+COLUMNS = 'chat_id, homework, homework_name, old_status, status, changed_at'
+
+Transition = namedtuple('Transition', (
+    'chat_id', 'homework', 'homework_name', 'old_status', 'status',
+    'changed_at',
+))
+
+
+def changed_at(homework, default=None):
+    """Unix-время смены статуса по ``date_updated`` домашки."""
+    date_updated = homework.get('date_updated')
+    if isinstance(date_updated, str):
+        try:
+            return int(datetime.fromisoformat(
+                date_updated.replace('Z', '+00:00')).timestamp())
+        except ValueError:
+            pass
+    if not isinstance(default, (int, float)):
+        default = time.time()
+    return int(default)
+
+
+class TransitionLog:
+    """Журнал смен статусов в SQLite."""
+
+    def __init__(self, path, busy_timeout=BUSY_TIMEOUT):
+        """Журнал в файле ``path``; таблица создаётся при открытии."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=busy_timeout,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        self._connection.commit()
+
+    def record(self, chat_id, homeworks, old_statuses, default_time=None):
+        """Запись смен статусов домашек.
+
+        ``old_statuses`` — словарь ``ключ домашки -> прежний статус``,
+        обычно ``StatusTracker.statuses`` до ``update``.
+        """
+        rows = [
+            (str(chat_id), homework_key(homework),
+             homework.get('homework_name'),
+             old_statuses.get(homework_key(homework)),
+             homework['status'], changed_at(homework, default_time))
+            for homework in homeworks
+        ]
+        if not rows:
+            return
+        with self._lock, self._connection:
+            self._connection.executemany(INSERT, rows)
+
+    def timeline(self, chat_id, homework):
+        """Все смены статуса домашки от старых к новым."""
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT {COLUMNS} FROM transitions '
+                'WHERE chat_id = ? AND homework = ? '
+                'ORDER BY changed_at, id',
+                (str(chat_id), str(homework)),
+            ).fetchall()
+        return [Transition(*row) for row in rows]
+
+    def between(self, start, end, chat_id=None, batch_size=1000):
+        """Смены статусов с ``start`` включительно до ``end`` по времени.
+
+        Строки читаются пачками по ``batch_size``, поэтому большой
+        период не загружается в память целиком.
+        """
+        query = (f'SELECT {COLUMNS} FROM transitions '
+                 'WHERE changed_at >= ? AND changed_at < ?')
+        params = [int(start), int(end)]
+        if chat_id is not None:
+            query += ' AND chat_id = ?'
+            params.append(str(chat_id))
+        query += ' ORDER BY changed_at, id'
+        with self._lock:
+            cursor = self._connection.execute(query, params)
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield from map(Transition._make, rows)
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def close(self):
+        """Закрытие базы."""
+        with self._lock:
+            self._connection.close()
+
+
+class NullLog:
+    """Журнал-заглушка, когда сохранение состояния не настроено."""
+
+    def record(self, chat_id, homeworks, old_statuses, default_time=None):
+        """Ничего не записывает."""
+
+    def timeline(self, chat_id, homework):
+        """Пустая история."""
+        return []
+
+    def between(self, start, end, chat_id=None, batch_size=1000):
+        """Пустая история."""
+        return iter(())
+
+    def close(self):
+        """Ничего не делает."""
+
+
+def open_log(path, **kwargs):
+    """Журнал в файле ``path`` или заглушка, если путь не задан."""
+    if not path:
+        return NullLog()
+    return TransitionLog(path, **kwargs)
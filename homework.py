@@ -1,16 +1,35 @@
+import functools
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 from sys import stdout
 
-import requests
-import telegram
 from dotenv import load_dotenv
 
-from exceptions import (EmptyResponseAPI, EnvironmentVariableMissing,
+import circuit
+import fingerprint
+import history
+import lazy
+import lifecycle
+import log_pipeline
+import metrics
+import outbox
+import scheduling
+import schema
+import state_store
+import streaming
+import templates
+from tracker import StatusTracker, homework_key
+from exceptions import (CircuitOpenError, EmptyResponseAPI,
+                        EnvironmentVariableMissing,
                         NotOkResponseStatusExeption, RequestError)
 
+requests = lazy.LazyModule('requests')
+telegram = lazy.LazyModule('telegram')
+http_session = lazy.LazyModule('http_session')
+
 load_dotenv()
 
 
@@ -21,6 +40,19 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STATE_FILE = os.getenv('STATE_FILE')
+HTTP_KEEP_ALIVE = os.getenv('HTTP_KEEP_ALIVE', '').lower() in (
+    '1', 'true', 'yes'
+)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 16))
+BATCH_TIMEOUT = (5, 30)
+STREAM_FULL_HISTORY = os.getenv('STREAM_FULL_HISTORY', '').lower() in (
+    '1', 'true', 'yes'
+)
+STREAMED_FIELDS = ('id', 'homework_name', 'status', 'date_updated')
+
+
+RESPONSE_CACHE = fingerprint.ResponseCache()
 
 
 HOMEWORK_VERDICTS = {
@@ -29,6 +61,8 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+TEMPLATES = templates.Catalog(HOMEWORK_VERDICTS)
+
 
 def check_tokens():
     """Проверка на присутствие обязательных переменных окружения."""
@@ -50,123 +84,331 @@ def check_tokens():
         raise EnvironmentVariableMissing(tokens)
 
 
+def make_headers(token):
+    """Заголовки авторизации запроса к API для переданного токена."""
+    return {'Authorization': f'OAuth {token}'}
+
+
 def send_message(bot, message):
     """Отправка сообщения в телеграм-чат бота и пользователя."""
+    return send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def is_rejected(error):
+    """Отказ Telegram, который не пройдёт при повторе той же отправки."""
+    return isinstance(error, (telegram.error.BadRequest,
+                              telegram.error.Unauthorized,
+                              telegram.error.ChatMigrated))
+
+
+def send_message_to(bot, chat_id, message):
+    """Отправка сообщения в указанный телеграм-чат.
+
+    Возвращает True, если сообщение отправлено, ``outbox.REJECTED``,
+    если Telegram его отверг, и False при временном сбое (сеть,
+    ``RetryAfter``, разомкнутый предохранитель).
+    """
     logging.debug('Готовимся отправить сообщение в телеграм-чат')
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        with circuit.TELEGRAM.guard(), metrics.TELEGRAM_SEND_SECONDS.time():
+            bot.send_message(chat_id, message)
         logging.debug('Сообщение в телеграм-чат отправлено')
+        return True
 
-    except telegram.error.TelegramError as error:
+    except (telegram.error.TelegramError, CircuitOpenError) as error:
+        metrics.count_error(error)
         message = f'Сбой в отправке сообщения ботом: {error}'
         logging.error(message)
+        if is_rejected(error):
+            return outbox.REJECTED
+        return False
 
 
-def get_api_answer(timestamp):
-    """Отправка get запроса API, обработка полученного ответа."""
-    payload = {'from_date': timestamp}
-
-    request_kwargs = {
-        'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': payload
-    }
+def deliver_pending(bot, box):
+    """Отправка недоставленных сообщений из outbox в их чаты.
 
-    message = 'Направляем запрос на {}, данные заголовка: {}, параметры: {}'
-    logging.debug(message.format(*request_kwargs.values()))
-    try:
-        homework = requests.get(**request_kwargs)
+    Сообщения для чата бота уходят через ``send_message``, остальные
+    (записанные, пока ``TELEGRAM_CHAT_ID`` был другим) — в свой чат.
+    """
+    def deliver(chat_id, message):
+        if chat_id == str(TELEGRAM_CHAT_ID):
+            return send_message(bot, message)
+        return send_message_to(bot, chat_id, message)
 
-        if homework.status_code != HTTPStatus.OK:
-            raise NotOkResponseStatusExeption(homework.status_code)
+    return box.drain(deliver)
 
-        return homework.json()
 
-    except requests.RequestException as error:
-        raise RequestError(error)
+def http_client():
+    """Клиент для запросов к API: общая сессия или модуль requests."""
+    if HTTP_KEEP_ALIVE:
+        return http_session.get_session()
+    return requests
 
 
-def check_response(response):
-    """Проверка полученного ответа на соответствие типам."""
-    must_have_keys = ('homeworks', 'current_date')
+def get_api_answer(timestamp):
+    """Отправка get запроса API, обработка полученного ответа.
+
+    С ``STREAM_FULL_HISTORY`` запрос всей истории (``timestamp`` 0)
+    разбирается потоком, см. ``streaming``.
+    """
+    if STREAM_FULL_HISTORY and not timestamp:
+        return request_api_answer(timestamp, HEADERS, stream=True)
+    return request_api_answer(timestamp, HEADERS, RESPONSE_CACHE)
+
+
+def get_api_answers(tokens, timestamp_map, max_workers=BATCH_WORKERS,
+                    timeout=BATCH_TIMEOUT):
+    """Параллельные запросы к API для нескольких токенов.
+
+    ``timestamp_map`` задаёт ``from_date`` для каждого токена, по
+    умолчанию 0. Возвращает словарь ``токен -> ответ API или
+    исключение``: ошибка одного запроса не мешает остальным.
+    """
+    jobs = {token: (timestamp_map.get(token, 0), make_headers(token))
+            for token in tokens}
+    return request_api_answers(jobs, max_workers, timeout)
+
+
+def request_api_answers(jobs, max_workers=BATCH_WORKERS,
+                        timeout=BATCH_TIMEOUT):
+    """Параллельные запросы к API.
+
+    ``jobs`` — словарь ``ключ -> (timestamp, заголовки)``. Запросы идут
+    в пуле не больше чем из ``max_workers`` потоков, у каждого свой
+    ``timeout``, поэтому пачка занимает примерно время самого долгого
+    запроса, а не сумму. С ``HTTP_KEEP_ALIVE`` потоков не больше, чем
+    соединений в пуле сессии. Возвращает словарь ``ключ -> ответ API
+    или исключение``.
+    """
+    results = {}
+    if not jobs:
+        return results
+    if HTTP_KEEP_ALIVE:
+        max_workers = min(max_workers, http_client().pool_maxsize)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)),
+                            thread_name_prefix='api-batch') as executor:
+        futures = {
+            key: executor.submit(request_api_answer, timestamp, headers,
+                                 RESPONSE_CACHE, timeout)
+            for key, (timestamp, headers) in jobs.items()
+        }
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as error:
+                results[key] = error
+    return results
+
+
+def request_api_answer(timestamp, headers, cache=None, timeout=None,
+                       stream=False):
+    """Запрос к API от имени владельца переданных заголовков.
+
+    С кэшем ответ, совпавший с предыдущим, не разбирается заново:
+    возвращается ``fingerprint.CachedResponse``. С ``stream`` тело
+    читается по мере разбора и возвращается
+    ``streaming.StreamedResponse``; кэш при этом не используется.
+    """
+    payload = {'from_date': timestamp}
+    key = None
+    if cache is not None:
+        key = cache.key(headers)
+        headers = {**headers, **cache.conditional_headers(key)}
 
-    if not isinstance(response, dict):
-        message = ('В ответе API структура данных не соответствует ожиданиям,'
-                   'ожидался тип данных dict')
-        raise TypeError(message)
+    request_kwargs = {
+        'url': ENDPOINT,
+        'headers': headers,
+        'params': payload
+    }
+    if timeout is not None:
+        request_kwargs['timeout'] = timeout
+    if stream:
+        request_kwargs['stream'] = True
 
-    for key in must_have_keys:
-        if key not in response:
-            message = (f'Нет обязательных ключей в ответе API. {message}')
-            raise EmptyResponseAPI(message)
+    logging.debug('Направляем запрос на %s, параметры: %s', ENDPOINT, payload)
+    with circuit.API.guard():
+        try:
+            with metrics.API_REQUEST_SECONDS.time():
+                homework = http_client().get(**request_kwargs)
 
-    response_homeworks = response.get('homeworks')
-    if not isinstance(response_homeworks, list):
-        message = ('В ответе API под ключом "homeworks"'
-                   ' данные приходят не в виде списка')
-        raise TypeError(message)
+            if (cache is not None
+                    and homework.status_code == HTTPStatus.NOT_MODIFIED):
+                cached = cache.not_modified(key)
+                if cached is not None:
+                    return cached
 
-    return response_homeworks
+            if homework.status_code != HTTPStatus.OK:
+                raise NotOkResponseStatusExeption(
+                    homework.status_code,
+                    getattr(homework, 'headers', {}).get('Retry-After')
+                )
 
+            return read_body(homework, cache, key, stream)
 
-def parse_status(homework):
-    """Обработка статуса полученной домашки."""
-    status = homework.get('status')
-    if not status:
-        message = 'Отсутствует "status" ключ в домашке'
-        raise KeyError(message)
+        except requests.RequestException as error:
+            raise RequestError(error)
 
-    homework_name = homework.get('homework_name')
-    if not homework_name:
-        message = 'No "homework_name" key in homework'
-        raise KeyError(message)
 
-    verdict = HOMEWORK_VERDICTS.get(status)
-    if not verdict:
-        message = f'Неизвестный HOMEWORK_VERDICTS ключ – {verdict}'
-        raise KeyError(message)
+def read_stream(homework):
+    """Куски тела ответа API под теми же защитами, что и сам запрос.
 
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    Тело потокового ответа читается уже после ``request_api_answer``,
+    поэтому обрыв соединения посреди чтения так же учитывается
+    предохранителем и превращается в ``RequestError``.
+    """
+    with circuit.API.guard():
+        try:
+            yield from homework.iter_content(streaming.CHUNK_SIZE)
+        except requests.RequestException as error:
+            raise RequestError(error)
+
+
+def read_body(homework, cache=None, key=None, stream=False):
+    """Тело ответа API: потоком, из кэша или через ``json()``."""
+    if stream:
+        return streaming.StreamedResponse(
+            read_stream(homework), close=homework.close,
+            keep=STREAMED_FIELDS)
+    if cache is None:
+        return homework.json()
+    cached = cache.match(key, homework)
+    if cached is not None:
+        return cached
+    response = homework.json()
+    cache.store(key, homework, response)
+    return response
+
+
+# Проверка ответа и разбор статуса — скомпилированные функции из
+# ``schema``, без обёрток: на каждый ответ и домашку это лишний вызов.
+check_response = schema.compile_response_validator(
+    streamed=streaming.StreamedResponse)
+parse_status = schema.compile_status_renderer(HOMEWORK_VERDICTS)
+
+
+def render_changes(changes, locale=None):
+    """Сообщения об изменениях статусов.
+
+    Без ``locale`` сообщения строит ``parse_status``, иначе — шаблоны
+    ``TEMPLATES`` на языке ``locale``. Домашка с ошибкой в данных не
+    мешает остальным: возвращаются сообщения, успешно обработанные
+    домашки и первая ошибка или None.
+    """
+    render = parse_status
+    if locale is not None:
+        render = functools.partial(TEMPLATES.render_homework, locale=locale)
+    messages = []
+    processed = []
+    first_error = None
+    for homework in changes:
+        try:
+            messages.append(render(homework))
+        except KeyError as error:
+            first_error = first_error or error
+            continue
+        processed.append(homework)
+    return messages, processed, first_error
+
+
+def notify_changes(bot, tracker, response, box=None, log=None):
+    """Отправка сообщений обо всех изменившихся статусах домашек.
+
+    С ``box`` сообщения не отправляются сразу, а записываются в outbox
+    до того, как статусы запоминаются в ``tracker``; с ``log`` смены
+    статусов дописываются в журнал. Возвращает домашки из ответа (для
+    потокового ответа — ``summary``) и признак изменений. Ответ,
+    совпавший с предыдущим, приходит из кэша без разбора JSON, но
+    сверяется с ``tracker`` как обычно: кэш общий для всех, кто
+    опрашивает API с тем же токеном.
+    """
+    homeworks = check_response(response)
+    changes = tracker.transitions(homeworks)
+    messages, processed, error = render_changes(changes)
+    if box is None:
+        for message in messages:
+            send_message(bot, message)
+    else:
+        for homework, message in zip(processed, messages):
+            old = tracker.statuses.get(homework_key(homework))
+            box.add(TELEGRAM_CHAT_ID, message, outbox.transition_key(
+                TELEGRAM_CHAT_ID, homework, old))
+        box.commit()
+    if log is not None:
+        log.record(TELEGRAM_CHAT_ID, processed, tracker.statuses,
+                   response.get('current_date'))
+    tracker.update(processed)
+    if error is not None:
+        raise error
+    if not changes:
+        logging.debug('Нет новых статусов')
+    if isinstance(response, streaming.StreamedResponse):
+        homeworks = response.summary()
+    return homeworks, bool(changes)
 
 
 def main():
-    """Основная логика работы бота."""
+    """Основная логика работы бота.
+
+    SIGTERM и SIGINT завершают работу после текущего цикла: начатый
+    запрос и отправка доводятся до конца, состояние сохраняется. SIGHUP
+    прерывает паузу и запускает следующий цикл сразу. Сообщения
+    проходят через outbox: не отправленные из-за сбоя Telegram
+    повторяются в следующих циклах.
+    """
     check_tokens()
 
+    metrics.start_server_from_env()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = 0
-    old_status = None
-
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if homeworks:
-                homework = homeworks[0]
-                message = parse_status(homework)
-            else:
-                message = 'Нет новых статусов'
-            if message != old_status:
-                old_status = message
-                send_message(bot, message)
-            timestamp = response.get('current_date', timestamp)
-        except EmptyResponseAPI as error:
-            logging.error(error)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logging.error(error)
-            if message != old_status:
-                old_status = message
-                send_message(bot, message)
-        finally:
-            time.sleep(RETRY_PERIOD)
+    store = state_store.open_store(STATE_FILE)
+    box = outbox.open_outbox(STATE_FILE)
+    log = history.open_log(STATE_FILE)
+    timestamp, old_status, statuses = store.load(TELEGRAM_CHAT_ID)
+    tracker = StatusTracker(statuses)
+    policy = scheduling.make_policy(RETRY_PERIOD)
+
+    with lifecycle.Lifecycle() as signals:
+        while not signals.stopping:
+            # Перечитывать в этом режиме нечего: SIGHUP только будит цикл.
+            signals.take_reload()
+            cycle_started = time.perf_counter()
+            try:
+                response = get_api_answer(timestamp)
+                _, changed = notify_changes(bot, tracker, response, box, log)
+                old_status = None
+                policy.observe(tracker.statuses.values(), changed)
+                timestamp = response.get('current_date', timestamp)
+            except (EmptyResponseAPI, CircuitOpenError) as error:
+                logging.error(error)
+                metrics.count_error(error)
+                policy.observe_error(error)
+            except Exception as error:
+                message = f'Сбой в работе программы: {error}'
+                logging.error(error)
+                metrics.count_error(error)
+                policy.observe_error(error)
+                if message != old_status:
+                    old_status = message
+                    box.add(TELEGRAM_CHAT_ID, message)
+                    box.commit()
+            finally:
+                deliver_pending(bot, box)
+                metrics.POLL_CYCLE_SECONDS.observe(
+                    time.perf_counter() - cycle_started)
+                store.save(TELEGRAM_CHAT_ID, timestamp, old_status,
+                           tracker.statuses)
+                with signals.interruptible():
+                    delay = signals.delay(policy.next_delay())
+                    time.sleep(delay)
+    box.close()
+    log.close()
+    store.close()
+    logging.info('Работа бота завершена')
 
 
 if __name__ == '__main__':
     logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s, %(levelname)s, %(message)s',
-        stream=stdout
+        level=log_pipeline.LOG_LEVEL,
+        handlers=log_pipeline.handlers(stdout),
     )
 
     main()
@@ -0,0 +1,90 @@
+"""Общая HTTP-сессия с пулом соединений для запросов к API.
+
+Одна ``requests.Session`` переиспользует TCP/TLS-соединения между
+циклами опроса, поэтому рукопожатия с ``ENDPOINT`` происходят только
+при открытии нового соединения.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+# По соединению на каждый поток пачки запросов (``homework.BATCH_WORKERS``):
+# лишние соединения urllib3 закрыл бы после запроса.
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE',
+                             os.getenv('BATCH_WORKERS', 16)))
+POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '').lower() in ('1', 'true', 'yes')
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """Сессия с настраиваемым пулом соединений и таймаутом по умолчанию.
+
+    ``pool_connections`` — сколько хостов держать в пуле,
+    ``pool_maxsize`` — сколько соединений держать на один хост,
+    ``pool_block`` — ждать свободного соединения вместо открытия
+    лишнего сверх ``pool_maxsize``.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        """Сессия с пулом соединений и таймаутом по умолчанию."""
+        super().__init__()
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.headers['Connection'] = 'keep-alive'
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Запрос с таймаутом сессии, если он не передан явно."""
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def connection_stats(self):
+        """Счётчики запросов и открытых соединений по всем хостам.
+
+        ``reused`` — сколько запросов обошлись без нового соединения.
+        """
+        requests_count = connections = 0
+        for adapter in set(self.adapters.values()):
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                requests_count += pool.num_requests
+                connections += pool.num_connections
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': max(requests_count - connections, 0),
+        }
+
+
+def get_session():
+    """Общая для всего процесса сессия, создаётся при первом вызове."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession()
+    return _session
+
+
+def close_session():
+    """Закрытие общей сессии и всех её соединений."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
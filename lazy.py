@@ -0,0 +1,54 @@
+"""Отложенный импорт тяжёлых зависимостей.
+
+``requests`` и ``python-telegram-bot`` вместе с ``urllib3`` и
+``certifi`` занимают большую часть времени импорта ``homework``. Через
+``LazyModule`` модуль импортируется при первом обращении к атрибуту,
+поэтому импорт модулей бота (тесты, CLI, форк процессов супервизора)
+не платит за зависимости, которые ему не понадобятся.
+
+Замер времени импорта: ``python -m benchmarks.startup``.
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    """Модуль, импортируемый при первом обращении к атрибуту.
+
+    Импорт идёт через ``importlib.import_module``, поэтому подмена
+    атрибутов настоящего модуля (например, в тестах) видна и через
+    ``LazyModule``. Первое обращение из нескольких потоков безопасно.
+    """
+
+    def __init__(self, name):
+        """Прокси модуля ``name``; сам импорт откладывается."""
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def load(self):
+        """Импорт модуля, если он ещё не импортирован."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self.__dict__['_module'] = importlib.import_module(
+                        self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        """Модуль уже импортирован."""
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        """Атрибут модуля; первое обращение импортирует модуль."""
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr, value):
+        """Установка атрибута модуля, например в тестах."""
+        setattr(self.load(), attr, value)
+
+    def __repr__(self):
+        """Имя модуля и признак загрузки."""
+        state = 'загружен' if self.loaded else 'не загружен'
+        return f'<LazyModule {self._name!r}, {state}>'
@@ -0,0 +1,105 @@
+"""Остановка и перезагрузка по сигналам.
+
+SIGTERM и SIGINT не прерывают цикл опроса на середине: начатый запрос
+и отправка доводятся до конца, состояние сохраняется, и цикл
+завершается. Прерывается только ожидание между циклами. SIGHUP так же
+прерывает ожидание и просит перечитать конфигурацию тенантов.
+"""
+import logging
+import signal
+import threading
+from contextlib import contextmanager
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+RELOAD_SIGNAL = getattr(signal, 'SIGHUP', None)
+
+
+class WakeUp(BaseException):
+    """Прерывание ожидания между циклами сигналом."""
+
+
+class Lifecycle:
+    """Флаги остановки и перезагрузки, выставляемые сигналами.
+
+    Используется как контекстный менеджер: обработчики сигналов
+    ставятся на входе и восстанавливаются на выходе. Вне главного
+    потока обработчики не ставятся, и флаги меняются только вызовами
+    ``stop`` и ``request_reload``.
+    """
+
+    def __init__(self):
+        """Флаги сброшены; обработчики ставит ``install``."""
+        self.stopping = False
+        self.reload_requested = False
+        self._sleeping = False
+        self._previous = {}
+
+    def install(self):
+        """Установка обработчиков сигналов."""
+        if threading.current_thread() is not threading.main_thread():
+            return self
+        for signum in STOP_SIGNALS:
+            self._previous[signum] = signal.signal(signum, self._on_stop)
+        if RELOAD_SIGNAL is not None:
+            self._previous[RELOAD_SIGNAL] = signal.signal(
+                RELOAD_SIGNAL, self._on_reload)
+        return self
+
+    def restore(self):
+        """Возврат прежних обработчиков сигналов."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous.clear()
+
+    def __enter__(self):
+        """Установка обработчиков сигналов."""
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        """Возврат прежних обработчиков сигналов."""
+        self.restore()
+
+    def stop(self):
+        """Запрос на остановку после текущего цикла."""
+        self.stopping = True
+
+    def request_reload(self):
+        """Запрос на перезагрузку конфигурации перед следующим циклом."""
+        self.reload_requested = True
+
+    def take_reload(self):
+        """True, если была запрошена перезагрузка; сбрасывает запрос."""
+        requested, self.reload_requested = self.reload_requested, False
+        return requested
+
+    def _wake(self):
+        if self._sleeping:
+            self._sleeping = False
+            raise WakeUp
+
+    def _on_stop(self, signum, frame):
+        logging.info('Получен сигнал %s, завершаем работу', signum)
+        self.stop()
+        self._wake()
+
+    def _on_reload(self, signum, frame):
+        logging.info('Получен сигнал %s, перечитываем конфигурацию', signum)
+        self.request_reload()
+        self._wake()
+
+    def delay(self, seconds):
+        """Пауза до следующего цикла: 0, если ждать уже нечего."""
+        if self.stopping or self.reload_requested:
+            return 0
+        return seconds
+
+    @contextmanager
+    def interruptible(self):
+        """Блок ожидания, который сигнал может прервать."""
+        self._sleeping = True
+        try:
+            yield
+        except WakeUp:
+            pass
+        finally:
+            self._sleeping = False
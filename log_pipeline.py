@@ -0,0 +1,152 @@
+"""Настройка логирования: очередь, JSON и скрытие токенов.
+
+``handlers(stream)`` передаётся в ``logging.basicConfig``:
+
+- с ``LOG_QUEUE=1`` цикл опроса только кладёт запись в очередь, а
+  форматирование и запись в поток идут в фоновом потоке
+  ``QueueListener``;
+- с ``LOG_FORMAT=json`` каждая запись выводится одной JSON-строкой;
+- OAuth-токены, токены ботов Telegram и значения секретных переменных
+  окружения заменяются на ``***`` при любом формате.
+
+Уровень задаёт ``LOG_LEVEL``; отключённые уровни ничего не стоят, если
+сообщения логируются с аргументами, а не готовыми строками.
+
+В процессе, созданном через ``fork``, слушатель очереди запускается
+заново со своей очередью; перед выходом такого процесса нужно вызвать
+``shutdown``.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_QUEUE = os.getenv('LOG_QUEUE', '').lower() in ('1', 'true', 'yes')
+TEXT_FORMAT = '%(asctime)s, %(levelname)s, %(message)s'
+SECRET_VARIABLES = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'WEBHOOK_SECRET')
+MASK = '***'
+TOKEN_PATTERNS = (
+    re.compile(r'(?<=OAuth )[^\s\'",}]+'),
+    re.compile(r'\d{5,}:[\w-]{30,}'),
+)
+
+
+def redact(text, secrets=()):
+    """Текст без токенов и значений из ``secrets``."""
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, MASK)
+    for pattern in TOKEN_PATTERNS:
+        text = pattern.sub(MASK, text)
+    return text
+
+
+def secrets_from_env(names=SECRET_VARIABLES):
+    """Значения секретных переменных окружения."""
+    return tuple(value for value in map(os.getenv, names) if value)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Текстовый формат со скрытыми токенами."""
+
+    def __init__(self, fmt=TEXT_FORMAT, secrets=None, **kwargs):
+        """Формат ``fmt``; по умолчанию скрываются токены из окружения."""
+        super().__init__(fmt, **kwargs)
+        self.secrets = secrets_from_env() if secrets is None else secrets
+
+    def format(self, record):
+        """Запись без токенов."""
+        return redact(super().format(record), self.secrets)
+
+
+class JsonFormatter(RedactingFormatter):
+    """Одна JSON-строка на запись, со скрытыми токенами."""
+
+    def format(self, record):
+        """JSON-строка записи."""
+        entry = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return redact(json.dumps(entry, ensure_ascii=False), self.secrets)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` для очереди внутри процесса.
+
+    Стандартный ``prepare`` форматирует сообщение в вызывающем потоке,
+    чтобы запись можно было передать в другой процесс. Здесь очередь
+    общая с потоком-слушателем, поэтому запись уходит как есть, а
+    форматирование выполняет слушатель.
+    """
+
+    def prepare(self, record):
+        """Запись без форматирования."""
+        return record
+
+
+def make_formatter(log_format=LOG_FORMAT, fmt=TEXT_FORMAT):
+    """Форматтер по названию формата."""
+    if log_format == 'json':
+        return JsonFormatter()
+    return RedactingFormatter(fmt)
+
+
+_listener = None
+
+
+def _start_listener(stream_handler):
+    global _listener
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        records, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return records
+
+
+def _restart_in_child():
+    if _listener is None:
+        return
+    records = _start_listener(*_listener.handlers)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, LazyQueueHandler):
+            handler.queue = records
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def shutdown():
+    """Остановка слушателя очереди с записью оставшихся сообщений."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def handlers(stream, log_format=LOG_FORMAT, use_queue=LOG_QUEUE,
+             fmt=TEXT_FORMAT):
+    """Обработчики для ``logging.basicConfig(handlers=...)``.
+
+    С очередью запускает ``QueueListener``; он останавливается и
+    дописывает очередь при выходе из процесса.
+    """
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(make_formatter(log_format, fmt))
+    if not use_queue:
+        return [stream_handler]
+    records = _start_listener(stream_handler)
+    atexit.register(shutdown)
+    return [LazyQueueHandler(records)]
@@ -0,0 +1,231 @@
+"""Метрики бота в текстовом формате Prometheus.
+
+Метрики копятся в памяти процесса всегда, а HTTP-эндпоинт ``/metrics``
+поднимается, только если задана переменная окружения ``METRICS_PORT``.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', r'\\').replace('"', r'\"')
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Монотонно растущий счётчик с необязательными метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Счётчик ``name`` с метками ``labelnames``."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Увеличение счётчика для набора меток."""
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение для набора меток."""
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        """Строки экспозиции."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(key)} {_format_value(value)}'
+                for key, value in items]
+
+
+class Gauge:
+    """Текущее значение; может вычисляться функцией при каждом опросе."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation):
+        """Показатель ``name`` со значением 0."""
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._function = None
+
+    def set(self, value):
+        """Установка значения."""
+        self._value = value
+
+    def set_function(self, function):
+        """Вычисление значения функцией при каждом чтении."""
+        self._function = function
+
+    def value(self):
+        """Текущее значение."""
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def samples(self):
+        """Строки экспозиции."""
+        return [f'{self.name} {_format_value(self.value())}']
+
+
+class Histogram:
+    """Распределение длительностей по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        """Гистограмма ``name`` с границами ``buckets``."""
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Учёт одного наблюдения."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Замер длительности блока кода."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self):
+        """Число наблюдений."""
+        return sum(self._counts)
+
+    def samples(self):
+        """Строки экспозиции."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} '
+                         f'{cumulative}')
+        lines.append(f'{self.name}_sum {_format_value(total)}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Пустой набор метрик."""
+        self._metrics = {}
+
+    def register(self, metric):
+        """Добавление метрики; имя должно быть уникальным."""
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'homework_api_request_seconds', 'Длительность запроса к API домашек.'))
+TELEGRAM_SEND_SECONDS = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds', 'Длительность отправки в Telegram.'))
+POLL_CYCLE_SECONDS = REGISTRY.register(Histogram(
+    'homework_poll_cycle_seconds', 'Длительность цикла опроса.'))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки по классам исключений.',
+    ('exception',)))
+DELIVERY_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'homework_delivery_queue_depth', 'Сообщения в очереди отправки.'))
+
+
+def count_error(error):
+    """Учёт исключения в счётчике ошибок."""
+    ERRORS.inc(exception=type(error).__name__)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(port, host=METRICS_HOST, registry=REGISTRY,
+                 poll_interval=0.5):
+    """Запуск эндпоинта ``/metrics`` в фоновом потоке."""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name='metrics',
+                     kwargs={'poll_interval': poll_interval}).start()
+    return server
+
+
+def start_server_from_env():
+    """Запуск эндпоинта, если задан ``METRICS_PORT``."""
+    if not METRICS_PORT:
+        return None
+    return start_server(METRICS_PORT)
@@ -0,0 +1,193 @@
+"""Исходящие сообщения с подтверждением доставки.
+
+Сообщение сначала записывается в таблицу ``outbox`` вместе с ключом
+идемпотентности и только потом отправляется; после успешной отправки
+запись помечается доставленной. Неотправленные сообщения остаются в
+таблице и уходят при следующей попытке, в том числе после перезапуска.
+
+Ключ перехода статуса строится из чата, домашки, прежнего и нового
+статуса и ``date_updated``, поэтому переход, найденный повторно
+(например, после падения до сохранения контрольной точки), не
+создаёт второго сообщения. Сообщение может уйти дважды, только если
+процесс упал между отправкой и отметкой о доставке.
+
+Новые записи цикла фиксируются одной транзакцией, отметка о доставке —
+сразу после отправки. Временные сбои (сеть, ``RetryAfter``, разомкнутый
+предохранитель) только откладывают отправку и попыток не расходуют.
+Сообщение, которое Telegram отверг ``MAX_ATTEMPTS`` раз (``BadRequest``,
+бот заблокирован в чате), откладывается навсегда, чтобы не задерживать
+следующие. Доставленные и отложенные записи хранятся ``RETENTION``
+секунд и затем удаляются.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from tracker import homework_key
+
+RETENTION = 7 * 24 * 60 * 60
+DRAIN_BATCH = 100
+MAX_ATTEMPTS = 5
+REJECTED = 'rejected'
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT NOT NULL UNIQUE,
+        chat_id TEXT NOT NULL,
+        message TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        delivered_at REAL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (id)
+    WHERE delivered_at IS NULL
+    ''',
+)
+INSERT = '''
+INSERT OR IGNORE INTO outbox (key, chat_id, message, created_at)
+VALUES (?, ?, ?, ?)
+'''
+SELECT_PENDING = '''
+SELECT key, chat_id, message FROM outbox
+WHERE delivered_at IS NULL AND attempts < ?
+ORDER BY id
+LIMIT ?
+'''
+
+Entry = namedtuple('Entry', ('key', 'chat_id', 'message'))
+
+
+def transition_key(chat_id, homework, old_status):
+    """Ключ идемпотентности сообщения о смене статуса домашки."""
+    return ':'.join((
+        str(chat_id), homework_key(homework), str(old_status),
+        str(homework.get('status')), str(homework.get('date_updated', '')),
+    ))
+
+
+class Outbox:
+    """Таблица исходящих сообщений в SQLite.
+
+    Без пути таблица живёт в памяти: сообщения, не отправленные из-за
+    сбоя Telegram, повторяются, но перезапуск процесса не переживают.
+    """
+
+    def __init__(self, path=':memory:', retention=RETENTION,
+                 max_attempts=MAX_ATTEMPTS, clock=time.time):
+        """Outbox в файле ``path``; таблица создаётся при открытии."""
+        self.path = path
+        self.retention = retention
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        columns = {row[1] for row in self._connection.execute(
+            'PRAGMA table_info(outbox)')}
+        if 'attempts' not in columns:
+            self._connection.execute('ALTER TABLE outbox ADD COLUMN '
+                                     'attempts INTEGER NOT NULL DEFAULT 0')
+        self._connection.commit()
+        self.prune()
+
+    def add(self, chat_id, message, key=None):
+        """Запись сообщения; False, если сообщение с ключом уже есть.
+
+        Запись фиксируется вызовом ``commit``. Без ключа сообщение
+        считается уникальным.
+        """
+        key = key or uuid.uuid4().hex
+        with self._lock:
+            cursor = self._connection.execute(
+                INSERT, (key, str(chat_id), message, self.clock()))
+        return cursor.rowcount == 1
+
+    def commit(self):
+        """Фиксация записанных сообщений одной транзакцией."""
+        with self._lock:
+            self._connection.commit()
+
+    def pending(self, limit=DRAIN_BATCH):
+        """Недоставленные сообщения в порядке записи."""
+        with self._lock:
+            rows = self._connection.execute(
+                SELECT_PENDING, (self.max_attempts, limit)).fetchall()
+        return [Entry(*row) for row in rows]
+
+    def mark_delivered(self, keys):
+        """Отметка о доставке сообщений с ключами ``keys``."""
+        now = self.clock()
+        with self._lock:
+            self._connection.executemany(
+                'UPDATE outbox SET delivered_at = ? WHERE key = ?',
+                [(now, key) for key in keys])
+            self._connection.commit()
+
+    def mark_failed(self, key):
+        """Учёт отказа в отправке; возвращает число попыток."""
+        with self._lock:
+            self._connection.execute(
+                'UPDATE outbox SET attempts = attempts + 1 WHERE key = ?',
+                (key,))
+            self._connection.commit()
+            row = self._connection.execute(
+                'SELECT attempts FROM outbox WHERE key = ?', (key,)
+            ).fetchone()
+        return row[0]
+
+    def drain(self, send, limit=DRAIN_BATCH):
+        """Отправка недоставленных сообщений через ``send(chat_id, text)``.
+
+        ``send`` возвращает False, если отправить не удалось из-за
+        временного сбоя, и ``REJECTED``, если Telegram отверг сообщение.
+        На первой неудаче отправка прекращается, чтобы сообщения не
+        обгоняли друг друга; оставшиеся уйдут при следующем вызове.
+        Попыткой считается только отказ: сообщение, отвергнутое
+        ``max_attempts`` раз, откладывается, и отправка продолжается.
+        Возвращает число доставленных сообщений.
+        """
+        delivered = 0
+        for entry in self.pending(limit):
+            result = send(entry.chat_id, entry.message)
+            if result is False:
+                break
+            if result is not REJECTED:
+                self.mark_delivered([entry.key])
+                delivered += 1
+                continue
+            if self.mark_failed(entry.key) < self.max_attempts:
+                break
+            logging.error('Сообщение в чат %s не доставлено за %s попыток '
+                          'и отложено', entry.chat_id, self.max_attempts)
+        return delivered
+
+    def prune(self):
+        """Удаление доставленных и отложенных записей старше ``retention``."""
+        cutoff = self.clock() - self.retention
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM outbox WHERE delivered_at < ? '
+                'OR (attempts >= ? AND created_at < ?)',
+                (cutoff, self.max_attempts, cutoff))
+            self._connection.commit()
+
+    def close(self):
+        """Фиксация записей и закрытие базы."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+def open_outbox(path, **kwargs):
+    """Outbox в файле ``path`` или в памяти, если путь не задан."""
+    return Outbox(path or ':memory:', **kwargs)
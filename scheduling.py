@@ -0,0 +1,138 @@
+"""Политики выбора паузы между запросами к API."""
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from exceptions import (CircuitOpenError, NotOkResponseStatusExeption,
+                        RequestError)
+
+REVIEWING_PERIOD = int(os.getenv('REVIEWING_PERIOD', 120))
+MAX_RETRY_PERIOD = int(os.getenv('MAX_RETRY_PERIOD', 3600))
+BACKOFF_FACTOR = 2
+IDLE_GRACE = 1
+JITTER = 0.1
+
+BACKOFF_ERRORS = (RequestError, NotOkResponseStatusExeption,
+                  CircuitOpenError)
+
+
+def parse_retry_after(value, now=None):
+    """Секунды из заголовка ``Retry-After`` (число или HTTP-дата)."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(moment.timestamp() - now, 0)
+
+
+class FixedPolicy:
+    """Постоянная пауза, как в исходном цикле ``main``."""
+
+    def __init__(self, period):
+        """Пауза ``period`` секунд."""
+        self.period = period
+
+    def observe(self, statuses, changed):
+        """Учёт успешного цикла опроса."""
+
+    def observe_error(self, error):
+        """Учёт цикла опроса, завершившегося ошибкой."""
+
+    def next_delay(self):
+        """Пауза перед следующим запросом."""
+        return self.period
+
+
+class AdaptivePolicy:
+    """Пауза, зависящая от статусов домашек и ошибок API.
+
+    - пока какая-либо домашка на проверке (``reviewing``), опрос идёт каждые
+      ``reviewing_period`` секунд;
+    - если статусы не меняются дольше ``idle_grace`` циклов, пауза
+      растёт экспоненциально от ``base_period`` до ``max_period``;
+    - при ``RequestError``, ``NotOkResponseStatusExeption`` и
+      ``CircuitOpenError`` пауза также растёт, но не бывает меньше
+      ``Retry-After`` из ответа API или времени до пробного запроса;
+    - к увеличенным паузам добавляется случайный разброс ``jitter``,
+      чтобы многие тенанты не приходили к API одновременно.
+    После изменения статуса пауза возвращается к ``base_period``.
+    """
+
+    def __init__(self, base_period, reviewing_period=REVIEWING_PERIOD,
+                 max_period=MAX_RETRY_PERIOD, factor=BACKOFF_FACTOR,
+                 idle_grace=IDLE_GRACE, jitter=JITTER, rand=random.random):
+        """Политика с базовой паузой ``base_period``."""
+        self.base_period = base_period
+        self.reviewing_period = min(reviewing_period, base_period)
+        self.max_period = max(max_period, base_period)
+        self.factor = factor
+        self.idle_grace = idle_grace
+        self.jitter = jitter
+        self.rand = rand
+        self.idle_cycles = 0
+        self.failures = 0
+        self.reviewing = False
+        self.retry_after = None
+
+    def observe(self, statuses, changed):
+        """Учёт успешного цикла опроса.
+
+        ``statuses`` — все известные статусы домашек, например
+        ``tracker.statuses.values()``, а не только домашки из ответа:
+        после первого запроса API возвращает лишь изменившиеся.
+        """
+        self.failures = 0
+        self.retry_after = None
+        self.reviewing = 'reviewing' in statuses
+        self.idle_cycles = 0 if changed else self.idle_cycles + 1
+
+    def observe_error(self, error):
+        """Учёт цикла опроса, завершившегося ошибкой."""
+        if not isinstance(error, BACKOFF_ERRORS):
+            self.failures = 0
+            self.retry_after = None
+            return
+        self.failures += 1
+        self.retry_after = parse_retry_after(
+            getattr(error, 'retry_after', None))
+
+    def _backoff(self, steps):
+        delay = min(self.base_period * self.factor ** steps, self.max_period)
+        return delay * (1 + self.jitter * self.rand())
+
+    def next_delay(self):
+        """Пауза перед следующим запросом."""
+        if self.failures:
+            delay = self._backoff(self.failures)
+            if self.retry_after is not None:
+                delay = max(delay, self.retry_after)
+            return delay
+        if self.reviewing:
+            return self.reviewing_period
+        if self.idle_cycles > self.idle_grace:
+            return self._backoff(self.idle_cycles - self.idle_grace)
+        return self.base_period
+
+
+POLICIES = {
+    'adaptive': AdaptivePolicy,
+    'fixed': FixedPolicy,
+}
+POLLING_POLICY = os.getenv('POLLING_POLICY', 'adaptive')
+
+
+def make_policy(base_period, name=None):
+    """Политика опроса по имени из ``POLLING_POLICY``."""
+    name = POLLING_POLICY if name is None else name
+    try:
+        return POLICIES[name](base_period)
+    except KeyError:
+        raise ValueError(f'Неизвестная политика опроса {name}')
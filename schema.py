@@ -0,0 +1,90 @@
+"""Скомпилированные проверки ответа API и домашек.
+
+Всё, что не зависит от конкретного ответа — обязательные ключи, тексты
+ошибок, конец сообщения для каждого статуса, — готовится один раз при
+компиляции схемы и попадает в замыкание проверяющей функции. На
+успешном пути проверка не создаёт строк, кроме самого сообщения, и не
+обращается к глобальным именам. Ошибочные данные уходят на медленный
+путь, который строит понятный текст исключения.
+"""
+from exceptions import EmptyResponseAPI
+
+RESPONSE_KEYS = ('homeworks', 'current_date')
+MESSAGE_PREFIX = 'Изменился статус проверки работы "'
+NOT_DICT = ('В ответе API структура данных не соответствует ожиданиям,'
+            'ожидался тип данных dict')
+MISSING_KEYS = 'Нет обязательных ключей в ответе API: {}'
+NOT_LIST = ('В ответе API под ключом "homeworks"'
+            ' данные приходят не в виде списка')
+NO_STATUS = 'Отсутствует "status" ключ в домашке'
+NO_NAME = 'No "homework_name" key in homework'
+UNKNOWN_STATUS = 'Неизвестный HOMEWORK_VERDICTS ключ – {}'
+
+
+def compile_response_validator(required=RESPONSE_KEYS,
+                               list_key='homeworks', streamed=None):
+    """Функция проверки ответа API, как у ``check_response``.
+
+    Для ответа типа ``streamed`` возвращаются его ``homeworks()``:
+    такие ответы проверяются по мере чтения.
+    """
+    required = tuple(required)
+    if list_key not in required:
+        required += (list_key,)
+
+    def missing(response):
+        keys = ', '.join(key for key in required if key not in response)
+        return EmptyResponseAPI(MISSING_KEYS.format(keys))
+
+    def validate(response):
+        """Проверка ответа API; возвращает список домашек."""
+        if type(response) is not dict and not isinstance(response, dict):
+            if streamed is not None and isinstance(response, streamed):
+                return response.homeworks()
+            raise TypeError(NOT_DICT)
+        for key in required:
+            if key not in response:
+                raise missing(response)
+        homeworks = response[list_key]
+        if type(homeworks) is not list and not isinstance(homeworks, list):
+            raise TypeError(NOT_LIST)
+        return homeworks
+
+    return validate
+
+
+def compile_status_renderer(verdicts):
+    """Функция, возвращающая сообщение об изменении статуса домашки.
+
+    Домашка, которую не удалось собрать быстрым путём (нет ключа,
+    название не строка), разбирается заново; если в ней нет статуса
+    или названия или статус неизвестен, выбрасывается ``KeyError`` с
+    понятным текстом.
+    """
+    prefix = MESSAGE_PREFIX
+    suffixes = {status: f'". {verdict}'
+                for status, verdict in verdicts.items()}
+
+    def parse(homework):
+        status = homework.get('status')
+        if not status:
+            raise KeyError(NO_STATUS)
+        name = homework.get('homework_name')
+        if not name:
+            raise KeyError(NO_NAME)
+        suffix = suffixes.get(status)
+        if suffix is None:
+            raise KeyError(UNKNOWN_STATUS.format(status))
+        return f'{prefix}{name}{suffix}'
+
+    def render(homework):
+        """Сообщение об изменении статуса домашки."""
+        try:
+            name = homework['homework_name']
+            if name:
+                return prefix + name + suffixes[homework['status']]
+        except (KeyError, TypeError):
+            pass
+        return parse(homework)
+
+    return render
@@ -0,0 +1,115 @@
+"""Сохранение состояния опроса между перезапусками бота.
+
+Для каждого ключа хранится ``current_date`` последнего ответа API,
+последнее доставленное сообщение об ошибке и статусы всех домашек.
+В режиме одного чата ключ — ``TELEGRAM_CHAT_ID``, у тенантов — чат и
+отпечаток токена (``tenants.state_key``). Столбец ключа по-прежнему
+называется ``chat_id``.
+Каждое сохранение фиксируется сразу и держит блокировку записи лишь
+на время одной вставки: файл могут делить несколько процессов и
+журнал статусов. Пачки fsync собирает сам WAL: с ``synchronous=NORMAL``
+коммит не ждёт диска, данные сбрасываются при контрольной точке WAL.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+BUSY_TIMEOUT = 30
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS checkpoints (
+    chat_id TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    last_status TEXT,
+    statuses TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL
+)
+'''
+UPSERT = '''
+INSERT INTO checkpoints (chat_id, timestamp, last_status, statuses,
+                         updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (chat_id) DO UPDATE SET
+    timestamp = excluded.timestamp,
+    last_status = excluded.last_status,
+    statuses = excluded.statuses,
+    updated_at = excluded.updated_at
+'''
+
+
+Checkpoint = namedtuple('Checkpoint', ('timestamp', 'last_status', 'statuses'))
+EMPTY_CHECKPOINT = Checkpoint(0, None, {})
+
+
+class StateStore:
+    """Хранилище контрольных точек в SQLite.
+
+    Каждое сохранение фиксируется сразу. Повторное сохранение того же
+    состояния не пишет на диск. Если файл занят другим процессом,
+    запись ждёт до ``busy_timeout`` секунд.
+    """
+
+    def __init__(self, path, busy_timeout=BUSY_TIMEOUT):
+        """Хранилище в файле ``path``; таблица создаётся при открытии."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=busy_timeout,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+        self._saved = {}
+
+    def load(self, key):
+        """Последняя контрольная точка по ключу ``key``."""
+        key = str(key)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT timestamp, last_status, statuses FROM checkpoints '
+                'WHERE chat_id = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return EMPTY_CHECKPOINT
+        self._saved[key] = row
+        return Checkpoint(row[0], row[1], json.loads(row[2]))
+
+    def save(self, key, timestamp, last_status, statuses=None):
+        """Сохранение контрольной точки по ключу ``key``."""
+        key = str(key)
+        state = (timestamp, last_status,
+                 json.dumps(statuses or {}, sort_keys=True,
+                            ensure_ascii=False))
+        if self._saved.get(key) == state:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(UPSERT, (key, *state, time.time()))
+        self._saved[key] = state
+
+    def close(self):
+        """Закрытие базы."""
+        with self._lock:
+            self._connection.close()
+
+
+class NullStore:
+    """Хранилище-заглушка, когда сохранение состояния не настроено."""
+
+    def load(self, key):
+        """Начальное состояние: вся история, сообщений ещё не было."""
+        return EMPTY_CHECKPOINT
+
+    def save(self, key, timestamp, last_status, statuses=None):
+        """Ничего не сохраняет."""
+
+    def close(self):
+        """Ничего не делает."""
+
+
+def open_store(path, **kwargs):
+    """Хранилище по пути к файлу или заглушка, если путь не задан."""
+    if not path:
+        return NullStore()
+    return StateStore(path, **kwargs)
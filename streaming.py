@@ -0,0 +1,175 @@
+"""Потоковый разбор ответа API.
+
+Ответ с полной историей (``from_date=0``) у давних аккаунтов бывает
+большим, а ``response.json()`` держит в памяти и тело ответа, и весь
+разобранный список домашек. ``StreamedResponse`` читает тело кусками и
+отдаёт домашки по одной по мере чтения: в памяти остаются только
+непрочитанный остаток буфера и текущая домашка. Остальные поля ответа
+(``current_date``) доступны через ``get`` после чтения домашек.
+
+Проверки те же, что у ``check_response``: ответ — объект, в нём есть
+все обязательные ключи, ``homeworks`` — список. Ошибка обнаруживается
+не раньше, чем до неё дойдёт чтение, поэтому домашки нужно дочитать
+до конца, прежде чем что-либо отправлять.
+"""
+import codecs
+import json
+
+import schema
+from exceptions import EmptyResponseAPI
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+NOT_HOMEWORK = 'В ответе API домашка приходит не в виде словаря'
+
+
+class StreamedResponse:
+    """Ответ API, разбираемый по мере чтения.
+
+    ``chunks`` — итератор по кускам тела в байтах, например
+    ``response.iter_content(CHUNK_SIZE)``. ``close`` вызывается, когда
+    тело прочитано или разбор прервался ошибкой. Если задан ``keep``,
+    у домашек остаются только эти ключи.
+    """
+
+    def __init__(self, chunks, close=None, keep=None,
+                 required=schema.RESPONSE_KEYS, list_key='homeworks'):
+        """Разбор начинается при первом обращении к домашкам."""
+        self._chunks = iter(chunks)
+        self._close = close
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        self._items = None
+        self.keep = keep
+        self.required = tuple(required)
+        self.list_key = list_key
+        self.fields = {}
+        self.statuses = set()
+        self.finished = False
+
+    def _fill(self):
+        """Чтение следующего куска; False, если тело закончилось."""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._buffer += self._utf8.decode(b'', final=True)
+            return False
+        self._buffer = (self._buffer[self._position:]
+                        + self._utf8.decode(chunk))
+        self._position = 0
+        return True
+
+    def _peek(self):
+        """Следующий значимый символ или пустая строка в конце тела."""
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position] in WHITESPACE):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char, error):
+        if self._peek() != char:
+            raise error
+        self._position += 1
+
+    def _value(self):
+        """Очередное JSON-значение из буфера.
+
+        Значение, которое кончается ровно на конце буфера, разбирается
+        заново после чтения следующего куска: число ``12`` могло быть
+        началом ``1234``.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer,
+                                                   self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def _homeworks(self):
+        self._expect('[', TypeError(schema.NOT_LIST))
+        while True:
+            char = self._peek()
+            if char == ']':
+                self._position += 1
+                return
+            if char == ',':
+                self._position += 1
+                continue
+            homework = self._value()
+            if not isinstance(homework, dict):
+                raise TypeError(NOT_HOMEWORK)
+            if self.keep is not None:
+                homework = {key: homework[key] for key in self.keep
+                            if key in homework}
+            self.statuses.add(homework.get('status'))
+            yield homework
+
+    def _parse(self):
+        self._expect('{', TypeError(schema.NOT_DICT))
+        while True:
+            char = self._peek()
+            if char == '}':
+                break
+            if char == ',':
+                self._position += 1
+                continue
+            key = self._value()
+            self._expect(':', ValueError(f'Нет ":" после ключа {key!r}'))
+            if key == self.list_key:
+                if self._peek() != '[':
+                    self._value()
+                    raise TypeError(schema.NOT_LIST)
+                self.fields[key] = None
+                yield from self._homeworks()
+            else:
+                self.fields[key] = self._value()
+        missing = [key for key in self.required + (self.list_key,)
+                   if key not in self.fields]
+        if missing:
+            raise EmptyResponseAPI(schema.MISSING_KEYS.format(
+                ', '.join(dict.fromkeys(missing))))
+        self.finished = True
+
+    def homeworks(self):
+        """Домашки в порядке ответа; разобрать их можно один раз."""
+        if self._items is None:
+            self._items = self._read()
+        return self._items
+
+    def _read(self):
+        try:
+            yield from self._parse()
+        finally:
+            if self._close is not None:
+                self._close()
+
+    def get(self, key, default=None):
+        """Поле ответа; непрочитанные домашки при этом пропускаются."""
+        for _ in self.homeworks():
+            pass
+        value = self.fields.get(key)
+        return default if value is None else value
+
+    def summary(self):
+        """По домашке на каждый встреченный статус.
+
+        Для вызывающего кода, которому нужны статусы, а не сами
+        домашки.
+        """
+        return [{'status': status} for status in self.statuses]
@@ -0,0 +1,358 @@
+"""Опрос тенантов в нескольких процессах.
+
+Супервизор форкает ``WORKERS`` процессов и раскладывает тенантов по ним
+консистентным хешированием имени тенанта. Упавший процесс
+перезапускается с тем же набором тенантов; если он падает чаще
+``MAX_RESTARTS`` раз за ``RESTART_WINDOW`` секунд, его слот убирается с
+кольца, а тенанты переходят к остальным процессам. Состояние тенантов
+восстанавливается из ``STATE_FILE``, поэтому без него перезапуск
+повторит уведомления.
+
+Сводное состояние процессов отдаётся в JSON на ``/health``, если задан
+``HEALTH_PORT``.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sys import stdout
+
+import homework
+import lifecycle
+import log_pipeline
+import tenants
+from exceptions import EnvironmentVariableMissing, TenantConfigError
+
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+HEALTH_HOST = os.getenv('HEALTH_HOST', '0.0.0.0')
+HEALTH_PORT = os.getenv('HEALTH_PORT')
+REPLICAS = 100
+MAX_RESTARTS = 3
+RESTART_WINDOW = 60
+CHECK_INTERVAL = 1
+STOP_TIMEOUT = tenants.SHUTDOWN_TIMEOUT + 10
+
+
+def ring_hash(value):
+    """Позиция строки на кольце."""
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HashRing:
+    """Консистентное хеширование с виртуальными узлами.
+
+    При удалении узла на другие узлы переходят только его ключи.
+    """
+
+    def __init__(self, nodes=(), replicas=REPLICAS):
+        """Кольцо с узлами ``nodes``, ``replicas`` точек на узел."""
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавление узла."""
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}#{replica}')
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node):
+        """Удаление узла."""
+        self._points = [point for point in self._points
+                        if self._owners[point] != node]
+        self._owners = {point: self._owners[point] for point in self._points}
+
+    @property
+    def nodes(self):
+        """Узлы кольца."""
+        return set(self._owners.values())
+
+    def node_for(self, key):
+        """Узел, отвечающий за ключ."""
+        if not self._points:
+            raise LookupError('На кольце нет узлов')
+        index = bisect.bisect(self._points, ring_hash(key))
+        return self._owners[self._points[index % len(self._points)]]
+
+
+def _run_worker(target, shard):
+    # До установки обработчиков в tenants.serve SIGTERM превращается
+    # в SystemExit, чтобы отработали finally с закрытием хранилища.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        target(shard)
+    finally:
+        log_pipeline.shutdown()
+
+
+def _serve_shard(shard):
+    tenants.serve(shard, with_commands=False)
+
+
+class Worker:
+    """Слот супервизора: процесс и закреплённые за ним тенанты."""
+
+    __slots__ = ('number', 'process', 'shard', 'restarts')
+
+    def __init__(self, number):
+        """Процесс с номером ``number``, ещё не запущенный."""
+        self.number = number
+        self.process = None
+        self.shard = []
+        self.restarts = deque()
+
+    @property
+    def alive(self):
+        """Процесс запущен и работает."""
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """Запуск, перезапуск и перебалансировка процессов опроса."""
+
+    def __init__(self, tenant_list, workers=WORKERS, target=_serve_shard,
+                 max_restarts=MAX_RESTARTS, restart_window=RESTART_WINDOW,
+                 clock=time.monotonic):
+        """Супервизор для ``tenant_list`` на ``workers`` процессов."""
+        self.tenants = tenant_list
+        self.target = target
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.clock = clock
+        self.context = multiprocessing.get_context('fork')
+        self.workers = {number: Worker(number) for number in range(workers)}
+        self.ring = HashRing(self.workers)
+        self._lock = threading.Lock()
+
+    def assign(self):
+        """Тенанты каждого слота по текущему кольцу."""
+        shards = {number: [] for number in self.ring.nodes}
+        for tenant in self.tenants:
+            shards[self.ring.node_for(str(tenant.name))].append(tenant)
+        return shards
+
+    def _spawn(self, worker):
+        worker.process = self.context.Process(
+            target=_run_worker, args=(self.target, worker.shard),
+            name=f'homework-worker-{worker.number}', daemon=True,
+        )
+        worker.process.start()
+        logging.info('Процесс %s запущен, тенантов: %s', worker.number,
+                     len(worker.shard))
+
+    def _stop(self, worker, timeout=STOP_TIMEOUT):
+        if worker.process is None:
+            return
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout)
+        worker.process = None
+
+    def start(self):
+        """Запуск процессов по текущему распределению."""
+        with self._lock:
+            for number, shard in self.assign().items():
+                worker = self.workers[number]
+                worker.shard = shard
+                self._spawn(worker)
+        return self
+
+    def rebalance(self):
+        """Перезапуск слотов, чей набор тенантов изменился."""
+        for number, shard in self.assign().items():
+            worker = self.workers[number]
+            if shard == worker.shard:
+                continue
+            logging.info('Процесс %s: тенантов было %s, стало %s', number,
+                         len(worker.shard), len(shard))
+            self._stop(worker)
+            worker.shard = shard
+            self._spawn(worker)
+
+    def reload(self, tenant_list):
+        """Переход на новый список тенантов.
+
+        Перезапускаются только процессы, чей набор тенантов изменился;
+        тенанты с прежним описанием остаются прежними объектами.
+        """
+        existing = {tenants.tenant_key(tenant): tenant
+                    for tenant in self.tenants}
+        with self._lock:
+            self.tenants = [existing.get(tenants.tenant_key(tenant), tenant)
+                            for tenant in tenant_list]
+            self.rebalance()
+
+    def check_workers(self):
+        """Перезапуск упавших процессов; возвращает их число."""
+        failed = 0
+        with self._lock:
+            for number in sorted(self.ring.nodes):
+                worker = self.workers[number]
+                if worker.alive:
+                    continue
+                failed += 1
+                exitcode = worker.process and worker.process.exitcode
+                logging.error('Процесс %s завершился с кодом %s', number,
+                              exitcode)
+                now = self.clock()
+                while (worker.restarts
+                       and now - worker.restarts[0] > self.restart_window):
+                    worker.restarts.popleft()
+                if (len(worker.restarts) >= self.max_restarts
+                        and len(self.ring.nodes) > 1):
+                    logging.error('Процесс %s перезапускается слишком '
+                                  'часто, тенанты переходят к остальным',
+                                  number)
+                    self.ring.remove(number)
+                    worker.process = None
+                    worker.shard = []
+                    self.rebalance()
+                    continue
+                worker.restarts.append(now)
+                self._spawn(worker)
+        return failed
+
+    def health(self):
+        """Сводное состояние процессов."""
+        with self._lock:
+            workers = [
+                {
+                    'worker': worker.number,
+                    'pid': worker.process and worker.process.pid,
+                    'alive': worker.alive,
+                    'tenants': len(worker.shard),
+                    'restarts': len(worker.restarts),
+                }
+                for worker in self.workers.values()
+                if worker.number in self.ring.nodes
+            ]
+        alive = sum(worker['alive'] for worker in workers)
+        if alive == len(workers):
+            status = 'ok'
+        else:
+            status = 'degraded' if alive else 'down'
+        return {'status': status, 'alive': alive, 'workers': workers,
+                'tenants': len(self.tenants)}
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Остановка всех процессов.
+
+        SIGTERM уходит всем процессам сразу, а ждут их до одного общего
+        срока: процессы дописывают очереди сообщений параллельно, и
+        остановка укладывается в ``timeout``, а не в ``timeout`` на
+        каждый процесс.
+        """
+        with self._lock:
+            running = [worker for worker in self.workers.values()
+                       if worker.process is not None]
+            for worker in running:
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            deadline = time.monotonic() + timeout
+            for worker in running:
+                worker.process.join(max(deadline - time.monotonic(), 0))
+                if worker.process.is_alive():
+                    logging.error('Процесс %s не остановился за %s с',
+                                  worker.number, timeout)
+                worker.process = None
+
+    def run_forever(self, interval=CHECK_INTERVAL, signals=None,
+                    reload=None):
+        """Наблюдение за процессами до остановки супервизора.
+
+        По SIGHUP вызывается ``reload()``, и супервизор переходит на
+        возвращённый список тенантов.
+        """
+        signals = lifecycle.Lifecycle() if signals is None else signals
+        try:
+            while not signals.stopping:
+                if signals.take_reload() and reload is not None:
+                    self.reload(reload())
+                self.check_workers()
+                with signals.interruptible():
+                    delay = signals.delay(interval)
+                    time.sleep(delay)
+        finally:
+            self.stop()
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/health':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        health = self.server.supervisor.health()
+        body = json.dumps(health).encode()
+        status = (HTTPStatus.OK if health['status'] != 'down'
+                  else HTTPStatus.SERVICE_UNAVAILABLE)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_health_server(supervisor, port, host=HEALTH_HOST,
+                        poll_interval=0.5):
+    """Запуск эндпоинта ``/health`` в фоновом потоке."""
+    server = ThreadingHTTPServer((host, int(port)), _HealthHandler)
+    server.daemon_threads = True
+    server.supervisor = supervisor
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name='health',
+                     kwargs={'poll_interval': poll_interval}).start()
+    return server
+
+
+def main():
+    """Запуск опроса всех тенантов реестра в нескольких процессах."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Отсустсвует обязательная переменная окружения '
+                         'TELEGRAM_TOKEN')
+        raise EnvironmentVariableMissing('TELEGRAM_TOKEN')
+    if not tenants.STATE_FILE:
+        logging.warning('STATE_FILE не задан: перезапуск процесса '
+                        'повторит уведомления его тенантов')
+
+    tenant_list = tenants.load_tenants()
+    supervisor = Supervisor(tenant_list).start()
+    logging.info('Тенантов: %s, процессов: %s', len(tenant_list), WORKERS)
+    if HEALTH_PORT:
+        start_health_server(supervisor, HEALTH_PORT)
+
+    def reload():
+        try:
+            return tenants.load_tenants()
+        except TenantConfigError as error:
+            logging.error('Конфигурация тенантов не перезагружена: %s',
+                          error)
+            return supervisor.tenants
+
+    with lifecycle.Lifecycle() as signals:
+        supervisor.run_forever(signals=signals, reload=reload)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=log_pipeline.LOG_LEVEL,
+        handlers=log_pipeline.handlers(stdout),
+    )
+
+    main()
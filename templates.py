@@ -0,0 +1,106 @@
+"""Сообщения об изменении статуса на разных языках.
+
+Шаблоны лежат в ``LOCALES_DIR`` файлами ``<локаль>.json``::
+
+    {
+        "message": "{homework_name}: {verdict}",
+        "verdicts": {"approved": "Approved!"}
+    }
+
+Локаль по умолчанию (``ru``) собирается из ``HOMEWORK_VERDICTS`` и
+может дополняться файлом ``ru.json``. Новые статусы и языки добавляются
+файлами без изменения кода. Если в локали нет статуса, сообщение
+строится по локали по умолчанию.
+
+Шаблон компилируется в пару «начало, конец» вокруг названия домашки
+для каждого статуса, а готовые сообщения кэшируются в LRU по ключу
+``(локаль, название, статус)``.
+"""
+import functools
+import json
+import logging
+import os
+import re
+
+import schema
+
+DEFAULT_LOCALE = 'ru'
+LOCALES_DIR = os.getenv(
+    'LOCALES_DIR', os.path.join(os.path.dirname(__file__), 'locales'))
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 4096))
+DEFAULT_MESSAGE = schema.MESSAGE_PREFIX + '{homework_name}". {verdict}'
+NAME_MARK = '\0'
+LOCALE_NAME = re.compile(r'[\w-]+')
+
+
+def compile_locale(message, verdicts):
+    """Начало и конец сообщения вокруг названия для каждого статуса."""
+    compiled = {}
+    for status, verdict in verdicts.items():
+        prefix, _, suffix = message.format(
+            homework_name=NAME_MARK, verdict=verdict).partition(NAME_MARK)
+        compiled[status] = (prefix, suffix)
+    return compiled
+
+
+class Catalog:
+    """Скомпилированные шаблоны всех локалей."""
+
+    def __init__(self, default_verdicts, directory=LOCALES_DIR,
+                 default_locale=DEFAULT_LOCALE, cache_size=RENDER_CACHE_SIZE):
+        """Каталог с шаблонами из ``directory``."""
+        self.directory = directory
+        self.default_locale = default_locale
+        self._default_verdicts = default_verdicts
+        self._locales = {}
+        self.render = functools.lru_cache(maxsize=cache_size)(self._render)
+
+    def _read(self, locale):
+        if not LOCALE_NAME.fullmatch(locale):
+            return None
+        path = os.path.join(self.directory, f'{locale}.json')
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logging.error('Не удалось прочитать шаблоны %s: %s', path, error)
+            return None
+
+    def locale(self, locale):
+        """Скомпилированные шаблоны локали или None, если её нет."""
+        if locale not in self._locales:
+            data = self._read(locale) or {}
+            verdicts = data.get('verdicts', {})
+            message = data.get('message')
+            if locale == self.default_locale:
+                verdicts = {**self._default_verdicts, **verdicts}
+                message = message or DEFAULT_MESSAGE
+            self._locales[locale] = (
+                compile_locale(message, verdicts) if message else None)
+        return self._locales[locale]
+
+    def _render(self, locale, homework_name, status):
+        parts = (self.locale(locale) or {}).get(status)
+        if parts is None:
+            parts = self.locale(self.default_locale).get(status)
+        if parts is None:
+            raise KeyError(schema.UNKNOWN_STATUS.format(status))
+        prefix, suffix = parts
+        return f'{prefix}{homework_name}{suffix}'
+
+    def render_homework(self, homework, locale=DEFAULT_LOCALE):
+        """Сообщение об изменении статуса домашки на языке ``locale``."""
+        status = homework.get('status')
+        if not status:
+            raise KeyError(schema.NO_STATUS)
+        homework_name = homework.get('homework_name')
+        if not homework_name:
+            raise KeyError(schema.NO_NAME)
+        return self.render(locale, homework_name, status)
+
+    def clear(self):
+        """Сброс скомпилированных шаблонов и кэша сообщений."""
+        self._locales.clear()
+        self.render.cache_clear()
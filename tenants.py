@@ -0,0 +1,446 @@
+"""Опрос API домашек для множества студентов в одном процессе.
+
+Каждый тенант — пара ``PRACTICUM_TOKEN``/``TELEGRAM_CHAT_ID`` со своим
+``timestamp`` и статусами домашек. Все тенанты
+обслуживаются одним ботом и одним планировщиком.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import count
+from sys import stdout
+
+import commands
+import delivery
+import history
+import homework
+import lazy
+import lifecycle
+import log_pipeline
+import metrics
+import scheduling
+import state_store
+from exceptions import (CircuitOpenError, EmptyResponseAPI,
+                        EnvironmentVariableMissing, TenantConfigError)
+from tracker import StatusTracker
+
+telegram = lazy.LazyModule('telegram')
+
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+TENANTS = os.getenv('TENANTS')
+STATE_FILE = os.getenv('STATE_FILE')
+HISTORY_SIZE = 10
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+
+class Tenant:
+    """Студент, за домашками которого следит бот."""
+
+    __slots__ = ('name', 'chat_id', 'headers', 'timestamp', 'old_status',
+                 'tracker', 'policy', 'lock', 'paused', 'history', 'locale')
+
+    def __init__(self, name, practicum_token, chat_id, timestamp=0,
+                 locale=None):
+        """Тенант ``name`` с токеном Практикума и чатом ``chat_id``."""
+        self.name = name
+        self.chat_id = chat_id
+        self.headers = homework.make_headers(practicum_token)
+        self.timestamp = timestamp
+        self.old_status = None
+        self.tracker = StatusTracker()
+        self.policy = scheduling.make_policy(homework.RETRY_PERIOD)
+        self.lock = threading.Lock()
+        self.paused = False
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.locale = locale
+
+    def __repr__(self):
+        """Имя и чат тенанта без токена."""
+        return f'Tenant({self.name!r}, chat_id={self.chat_id!r})'
+
+
+def parse_tenants_spec(spec):
+    """Разбор строки вида ``token:chat_id;token:chat_id``."""
+    tenants = []
+    for number, item in enumerate(filter(None, spec.split(';')), start=1):
+        token, sep, chat_id = item.strip().rpartition(':')
+        if not sep or not token or not chat_id:
+            raise TenantConfigError(f'Запись №{number} не в формате '
+                                    'token:chat_id')
+        tenants.append(Tenant(chat_id, token, chat_id))
+    return tenants
+
+
+def read_tenants_file(path):
+    """Чтение списка тенантов из json-файла."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            records = json.load(file)
+    except (OSError, ValueError) as error:
+        raise TenantConfigError(error)
+
+    if not isinstance(records, list):
+        raise TenantConfigError('Ожидался список тенантов')
+
+    tenants = []
+    for record in records:
+        try:
+            tenants.append(Tenant(
+                record.get('name', record['chat_id']),
+                record['practicum_token'],
+                record['chat_id'],
+                locale=record.get('locale'),
+            ))
+        except (AttributeError, KeyError) as error:
+            raise TenantConfigError(f'Нет обязательного поля {error}')
+    return tenants
+
+
+def load_tenants(path=None, spec=None):
+    """Загрузка реестра тенантов.
+
+    Источники по приоритету: json-файл, переменная окружения ``TENANTS``,
+    одиночные переменные бота.
+    """
+    path = TENANTS_FILE if path is None else path
+    spec = TENANTS if spec is None else spec
+    if path:
+        tenants = read_tenants_file(path)
+    elif spec:
+        tenants = parse_tenants_spec(spec)
+    elif homework.PRACTICUM_TOKEN and homework.TELEGRAM_CHAT_ID:
+        tenants = [Tenant(homework.TELEGRAM_CHAT_ID,
+                          homework.PRACTICUM_TOKEN,
+                          homework.TELEGRAM_CHAT_ID)]
+    else:
+        tenants = []
+
+    if not tenants:
+        raise TenantConfigError('Не задано ни одного тенанта')
+    return tenants
+
+
+def tenant_key(tenant):
+    """Всё, что задаёт тенанта в конфигурации."""
+    return (tenant.name, tenant.chat_id, tenant.headers.get('Authorization'),
+            tenant.locale)
+
+
+def merge_tenants(store, current, loaded):
+    """Список тенантов после перечитывания конфигурации.
+
+    Тенанты, чьё описание не изменилось, остаются прежними объектами
+    вместе с состоянием; новые и изменённые восстанавливаются из
+    хранилища, а у удалённых состояние сохраняется.
+    """
+    existing = {tenant_key(tenant): tenant for tenant in current}
+    merged = []
+    for tenant in loaded:
+        kept = existing.pop(tenant_key(tenant), None)
+        if kept is None:
+            restore_state(store, [tenant])
+            kept = tenant
+        merged.append(kept)
+    for tenant in existing.values():
+        checkpoint(store, tenant)
+    logging.info('Тенантов после перезагрузки: %s, удалено: %s',
+                 len(merged), len(existing))
+    return merged
+
+
+def reload_tenants(store, current):
+    """Перечитывание реестра; при ошибке остаются текущие тенанты."""
+    try:
+        loaded = load_tenants()
+    except TenantConfigError as error:
+        logging.error('Конфигурация тенантов не перезагружена: %s', error)
+        return current
+    return merge_tenants(store, current, loaded)
+
+
+def state_key(tenant):
+    """Ключ контрольной точки тенанта: чат и отпечаток токена.
+
+    Одного чата мало: в групповой чат могут сообщать несколько
+    студентов со своими токенами. Токен в хранилище не попадает.
+    """
+    token = tenant.headers.get('Authorization', '').encode()
+    digest = hashlib.blake2b(token, digest_size=8).hexdigest()
+    return f'{tenant.chat_id}:{digest}'
+
+
+def restore_state(store, tenant_list):
+    """Восстановление ``timestamp`` и последнего сообщения тенантов."""
+    for tenant in tenant_list:
+        tenant.timestamp, tenant.old_status, statuses = store.load(
+            state_key(tenant))
+        tenant.tracker = StatusTracker(statuses)
+
+
+def checkpoint(store, tenant):
+    """Сохранение состояния тенанта после цикла опроса.
+
+    Ошибка записи не останавливает опрос: контрольная точка будет
+    сохранена после следующего цикла.
+    """
+    try:
+        store.save(state_key(tenant), tenant.timestamp, tenant.old_status,
+                   tenant.tracker.statuses)
+    except sqlite3.Error as error:
+        logging.error('%s: состояние не сохранено: %s', tenant.name, error)
+        metrics.count_error(error)
+
+
+def remember_status(tenant, message):
+    """Запоминает сообщение об ошибке; возвращает его, если оно новое."""
+    if message == tenant.old_status:
+        return None
+    tenant.old_status = message
+    return message
+
+
+def handle_response(tenant, response, log=None, push=False):
+    """Сообщения тенанту обо всех изменившихся статусах домашек.
+
+    Статусы запоминаются сразу: сообщения уходят вызывающему коду,
+    который отвечает за их доставку. Ответ старше уже обработанного
+    пропускается. Смены статусов дописываются в журнал ``log``, если он
+    передан. ``current_date`` push-события (``push``) задаёт
+    отправитель, поэтому оно не сдвигает ``tenant.timestamp`` и не
+    проверяется на устаревание.
+    """
+    current_date = response.get('current_date')
+    if (not push and isinstance(current_date, int)
+            and current_date < tenant.timestamp):
+        logging.debug('%s: устаревший ответ API пропущен', tenant.name)
+        return []
+    homeworks = homework.check_response(response)
+    changes = tenant.tracker.transitions(homeworks)
+    messages, processed, error = homework.render_changes(
+        changes, tenant.locale)
+    if log is not None:
+        log.record(tenant.chat_id, processed, tenant.tracker.statuses,
+                   current_date)
+    tenant.tracker.update(processed)
+    changed_at = time.time()
+    tenant.history.extend((changed_at, message) for message in messages)
+    if error is not None:
+        return messages + handle_error(tenant, error)
+    tenant.old_status = None
+    if not push:
+        tenant.timestamp = response.get('current_date', tenant.timestamp)
+    tenant.policy.observe(tenant.tracker.statuses.values(), bool(changes))
+    return messages
+
+
+def handle_error(tenant, error):
+    """Сообщения тенанту об ошибке цикла опроса."""
+    logging.error('%s: %s', tenant.name, error)
+    metrics.count_error(error)
+    tenant.policy.observe_error(error)
+    if isinstance(error, (EmptyResponseAPI, CircuitOpenError)):
+        return []
+    message = remember_status(tenant, f'Сбой в работе программы: {error}')
+    return [message] if message else []
+
+
+def poll_tenant(bot, tenant, store=None, queue=None, log=None):
+    """Один цикл опроса API для тенанта: то же, что итерация ``main``.
+
+    Если передана очередь отправки, сообщения ставятся в неё,
+    иначе отправляются сразу. Запрос ограничен ``BATCH_TIMEOUT``:
+    зависшее соединение не должно останавливать опрос остальных
+    тенантов.
+    """
+    with metrics.POLL_CYCLE_SECONDS.time():
+        try:
+            answer = homework.request_api_answer(
+                tenant.timestamp, tenant.headers, homework.RESPONSE_CACHE,
+                homework.BATCH_TIMEOUT)
+        except Exception as error:
+            answer = error
+        process_answer(bot, tenant, answer, store, queue, log)
+
+
+def process_answer(bot, tenant, answer, store=None, queue=None, log=None):
+    """Обработка ответа API или ошибки запроса и отправка сообщений."""
+    with tenant.lock:
+        try:
+            if isinstance(answer, Exception):
+                raise answer
+            messages = handle_response(tenant, answer, log)
+        except Exception as error:
+            messages = handle_error(tenant, error)
+    for message in messages:
+        if queue is not None:
+            queue.put(tenant.chat_id, message)
+        else:
+            homework.send_message_to(bot, tenant.chat_id, message)
+    if store is not None:
+        checkpoint(store, tenant)
+
+
+class TenantScheduler:
+    """Планировщик опроса тенантов.
+
+    Тенанты хранятся в куче по времени следующего опроса. Первые опросы
+    равномерно распределяются по периоду, чтобы не отправлять сотни
+    запросов одновременно, дальше паузу для каждого тенанта выбирает
+    его политика опроса.
+    """
+
+    def __init__(self, bot, tenants, period=homework.RETRY_PERIOD,
+                 clock=time.monotonic, store=None, queue=None, log=None):
+        """Планировщик опроса ``tenants`` через ``bot``."""
+        self.bot = bot
+        self.queue = queue
+        self.store = state_store.NullStore() if store is None else store
+        self.log = history.NullLog() if log is None else log
+        self.period = period
+        self.clock = clock
+        self._order = count()
+        self._queue = []
+        now = clock()
+        step = period / len(tenants) if tenants else 0
+        for number, tenant in enumerate(tenants):
+            self._push(now + number * step, tenant)
+
+    def _push(self, due, tenant):
+        heapq.heappush(self._queue, (due, next(self._order), tenant))
+
+    @property
+    def tenants(self):
+        """Тенанты в порядке очереди опроса."""
+        return [tenant for _, _, tenant in sorted(self._queue)]
+
+    def run_pending(self):
+        """Опрос всех тенантов, чей срок подошёл; возвращает их число.
+
+        Если срок подошёл сразу у нескольких тенантов, запросы к API
+        уходят параллельно через ``homework.request_api_answers``.
+        """
+        now = self.clock()
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, _, tenant = heapq.heappop(self._queue)
+            if tenant.paused:
+                self._push(now + self.period, tenant)
+                continue
+            due.append(tenant)
+        if len(due) == 1:
+            poll_tenant(self.bot, due[0], self.store, self.queue, self.log)
+        elif due:
+            with metrics.POLL_CYCLE_SECONDS.time():
+                answers = homework.request_api_answers(
+                    {tenant: (tenant.timestamp, tenant.headers)
+                     for tenant in due})
+                for tenant in due:
+                    process_answer(self.bot, tenant, answers[tenant],
+                                   self.store, self.queue, self.log)
+        for tenant in due:
+            self._push(now + tenant.policy.next_delay(), tenant)
+        return len(due)
+
+    def reload(self, tenants):
+        """Замена списка тенантов.
+
+        Оставшиеся тенанты сохраняют срок следующего опроса, новые
+        опрашиваются сразу.
+        """
+        due_times = {tenant: due for due, _, tenant in self._queue}
+        now = self.clock()
+        self._queue = []
+        for tenant in tenants:
+            self._push(due_times.get(tenant, now), tenant)
+
+    def seconds_until_next(self):
+        """Сколько секунд осталось до следующего опроса."""
+        if not self._queue:
+            return self.period
+        return max(self._queue[0][0] - self.clock(), 0)
+
+    def run_forever(self, signals=None, reload=None):
+        """Цикл опроса до остановки по сигналу.
+
+        По SIGHUP вызывается ``reload(текущие тенанты)``, и планировщик
+        переходит на возвращённый список.
+        """
+        signals = lifecycle.Lifecycle() if signals is None else signals
+        while not signals.stopping:
+            if signals.take_reload() and reload is not None:
+                self.reload(reload(self.tenants))
+            self.run_pending()
+            with signals.interruptible():
+                delay = signals.delay(self.seconds_until_next())
+                time.sleep(delay)
+
+
+def shutdown(store, queue, tenants):
+    """Отправка сообщений из очереди и сохранение состояния тенантов."""
+    if not queue.stop(SHUTDOWN_TIMEOUT):
+        logging.error('Не все сообщения отправлены до остановки')
+    for tenant in tenants:
+        checkpoint(store, tenant)
+    store.close()
+
+
+def serve(tenants, with_commands=True, reloadable=True):
+    """Опрос переданных тенантов до остановки процесса.
+
+    SIGTERM и SIGINT останавливают опрос после текущего цикла, SIGHUP
+    перечитывает реестр тенантов, если ``reloadable``.
+    """
+    store = state_store.open_store(STATE_FILE)
+    log = history.open_log(STATE_FILE)
+    restore_state(store, tenants)
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    queue = delivery.DeliveryQueue(bot).start()
+    command_bot = None
+    if with_commands:
+        command_bot = commands.start_from_env(tenants,
+                                              homework.TELEGRAM_TOKEN)
+
+    def reload(current):
+        updated = reload_tenants(store, current)
+        if command_bot is not None:
+            command_bot.set_tenants(updated)
+        return updated
+
+    scheduler = TenantScheduler(bot, tenants, store=store, queue=queue,
+                                log=log)
+    with lifecycle.Lifecycle() as signals:
+        try:
+            scheduler.run_forever(signals, reload if reloadable else None)
+        finally:
+            if command_bot is not None:
+                command_bot.stop()
+            shutdown(store, queue, scheduler.tenants)
+            log.close()
+
+
+def main():
+    """Запуск опроса для всех тенантов реестра."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Отсустсвует обязательная переменная окружения '
+                         'TELEGRAM_TOKEN')
+        raise EnvironmentVariableMissing('TELEGRAM_TOKEN')
+
+    tenants = load_tenants()
+    metrics.start_server_from_env()
+    logging.info('Загружено тенантов: %s', len(tenants))
+    serve(tenants)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=log_pipeline.LOG_LEVEL,
+        handlers=log_pipeline.handlers(stdout),
+    )
+
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+HOUR = 60 * 60
+
+
+@pytest.fixture
+def analytics_module():
+    import analytics
+    return analytics
+
+
+class TestAnalytics:
+
+    def test_status_codes(self, analytics_module):
+        codes = analytics_module.encode_statuses(
+            ['approved', 'reviewing', 'rejected', 'lost'])
+        assert codes.dtype == np.uint8
+        assert list(codes) == [1, 2, 3, 0]
+
+    def test_reviews(self, analytics_module):
+        transitions = analytics_module.make_transitions([
+            ('1', 'a', 'approved', 5 * HOUR),
+            ('1', 'a', 'reviewing', 0),
+            ('1', 'b', 'reviewing', HOUR),
+            ('1', 'b', 'rejected', 3 * HOUR),
+            ('1', 'b', 'reviewing', 4 * HOUR),
+            ('2', 'a', 'reviewing', 0),
+        ])
+        review_set = analytics_module.reviews(transitions)
+        assert sorted(review_set.duration) == [2 * HOUR, 5 * HOUR], (
+            'Срок ревью — от reviewing до следующего вердикта той же домашки.'
+        )
+        assert sorted(review_set.outcome) == [
+            analytics_module.APPROVED, analytics_module.REJECTED
+        ]
+
+    def test_grouped_percentiles_match_numpy(self, analytics_module):
+        rng = np.random.default_rng(0)
+        groups = rng.integers(0, 5, 1000)
+        values = rng.integers(0, 10 ** 6, 1000)
+        keys, sizes, result = analytics_module.grouped_percentiles(
+            groups, values)
+        for key, size, row in zip(keys, sizes, result):
+            expected = np.percentile(values[groups == key], [50, 90, 99])
+            assert size == np.sum(groups == key)
+            assert np.allclose(row, expected)
+
+    def test_report_from_log(self, tmp_path, analytics_module):
+        import history
+        path = str(tmp_path / 'state.sqlite3')
+        log = history.TransitionLog(path)
+        for number, verdict in enumerate(('approved', 'rejected')):
+            log.record(1, [{'id': number, 'status': 'reviewing'}], {},
+                       default_time=0)
+            log.record(1, [{'id': number, 'status': verdict}], {},
+                       default_time=(number + 1) * HOUR)
+        log.close()
+
+        review_set = analytics_module.reviews(
+            analytics_module.load_transitions(path))
+        row, = analytics_module.build_report(review_set, by='cohort')
+        assert row['group'] == '1' and row['reviews'] == 2
+        assert row['rejected'] == 0.5
+        assert row['percentiles_h'][0] == 1.5
+        counts = analytics_module.histogram(review_set.duration)
+        assert counts.sum() == 2
+        assert 'возвраты' in analytics_module.format_report([row], counts)
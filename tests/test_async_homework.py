@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+import utils
+from aiohttp import web
+
+
+@pytest.fixture
+def async_module():
+    import async_homework
+    return async_homework
+
+
+def run_with_server(handler, coroutine_factory):
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await coroutine_factory(f'http://127.0.0.1:{port}/')
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+class TestAsyncHomework:
+
+    def test_async_get_api_answer(self, monkeypatch, random_timestamp,
+                                  async_module):
+        async def handler(request):
+            assert request.headers['Authorization'].startswith('OAuth ')
+            assert request.query['from_date'] == '0'
+            return web.json_response(
+                {'homeworks': [], 'current_date': random_timestamp})
+
+        async def scenario(url):
+            monkeypatch.setattr(async_module.homework, 'ENDPOINT', url)
+            async with async_module.create_session() as session:
+                return await async_module.async_get_api_answer(session, 0)
+
+        result = run_with_server(handler, scenario)
+        assert result == {'homeworks': [], 'current_date': random_timestamp}
+
+    def test_async_get_api_answer_not_ok(self, monkeypatch, async_module):
+        async def handler(request):
+            return web.json_response({}, status=500)
+
+        async def scenario(url):
+            monkeypatch.setattr(async_module.homework, 'ENDPOINT', url)
+            async with async_module.create_session() as session:
+                await async_module.async_get_api_answer(session, 0)
+
+        with pytest.raises(async_module.NotOkResponseStatusExeption):
+            run_with_server(handler, scenario)
+
+    def test_poller_cycle_limits_concurrency(self, monkeypatch,
+                                             random_timestamp, async_module):
+        in_flight = []
+        peak = []
+
+        async def handler(request):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return web.json_response({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        bot = utils.MockTelegramBot()
+        sent = []
+        bot.send_message = lambda chat_id, text: sent.append(chat_id)
+        tenants = async_module.tenants.parse_tenants_spec(
+            ';'.join(f't{number}:{number}' for number in range(6)))
+
+        async def scenario(url):
+            monkeypatch.setattr(async_module.homework, 'ENDPOINT', url)
+            poller = async_module.AsyncPoller(bot, tenants, concurrency=2)
+            async with async_module.create_session() as session:
+                await poller.run_cycle(session)
+
+        run_with_server(handler, scenario)
+        assert sorted(sent) == sorted(str(number) for number in range(6))
+        assert max(peak) <= 2, (
+            'Число одновременных запросов должно быть ограничено.'
+        )
+
+    def test_poller_updates_tenant_under_lock(self, monkeypatch,
+                                              random_timestamp, async_module):
+        async def handler(request):
+            return web.json_response({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        tenant, = async_module.tenants.parse_tenants_spec('t1:1')
+        handle_response = async_module.tenants.handle_response
+        locked = []
+
+        def checked_handle_response(tenant, *args, **kwargs):
+            locked.append(tenant.lock.locked())
+            return handle_response(tenant, *args, **kwargs)
+
+        monkeypatch.setattr(async_module.tenants, 'handle_response',
+                            checked_handle_response)
+        bot = utils.MockTelegramBot()
+        bot.send_message = lambda chat_id, text: None
+
+        async def scenario(url):
+            monkeypatch.setattr(async_module.homework, 'ENDPOINT', url)
+            poller = async_module.AsyncPoller(bot, [tenant])
+            async with async_module.create_session() as session:
+                await poller.poll_tenant(session, tenant)
+
+        run_with_server(handler, scenario)
+        assert locked == [True], (
+            'Статусы тенанта должны меняться под `tenant.lock`: их читают '
+            'команды бота из других потоков.'
+        )
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+import requests
+import utils
+
+
+@pytest.fixture
+def slow_api(monkeypatch, random_timestamp):
+    seen = []
+    lock = threading.Lock()
+
+    def mock_get(*args, **kwargs):
+        token = kwargs['headers']['Authorization'].split()[-1]
+        with lock:
+            seen.append(kwargs)
+        time.sleep(0.2)
+        if token == 'broken':
+            raise requests.ConnectionError('connection refused')
+        return utils.MockResponseGET(
+            random_timestamp=random_timestamp,
+            data={
+                'homeworks': [{'homework_name': f'hw {token}',
+                               'status': 'approved'}],
+                'current_date': random_timestamp,
+            },
+        )
+
+    monkeypatch.setattr(requests, 'get', mock_get)
+    return seen
+
+
+class TestBatch:
+
+    def test_answers_are_fetched_in_parallel(self, slow_api):
+        import homework
+        tokens = [f'token{number}' for number in range(5)] + ['broken']
+        started = time.perf_counter()
+        answers = homework.get_api_answers(tokens, {'token0': 100})
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.6, (
+            'Запросы пачки должны идти параллельно, а не по очереди.'
+        )
+        assert set(answers) == set(tokens)
+        assert answers['token1']['homeworks'][0]['homework_name'] == (
+            'hw token1'
+        )
+        assert isinstance(answers['broken'], homework.RequestError), (
+            'Ошибка запроса должна возвращаться для своего токена.'
+        )
+        assert all('timeout' in kwargs for kwargs in slow_api)
+        assert {kwargs['params']['from_date'] for kwargs in slow_api} == {
+            0, 100
+        }
+
+    def test_scheduler_polls_due_tenants_in_one_batch(self, slow_api):
+        import tenants
+        tenant_list = tenants.parse_tenants_spec(
+            ';'.join(f'token{number}:{number}' for number in range(4)))
+        scheduler = tenants.TenantScheduler(
+            utils.MockTelegramBot(), tenant_list, period=0,
+            clock=lambda: 0)
+
+        started = time.perf_counter()
+        assert scheduler.run_pending() == 4
+        assert time.perf_counter() - started < 0.6
+        assert all(tenant.tracker.statuses for tenant in tenant_list)
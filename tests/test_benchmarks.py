@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture
+def polling_module():
+    from benchmarks import polling
+    return polling
+
+
+class TestBenchmarks:
+
+    def test_run_benchmarks_smoke(self, polling_module):
+        results = polling_module.run_benchmarks(tenant_count=2, cycles=2,
+                                                payload_size=2)
+        assert [result['engine'] for result in results] == [
+            'main', 'tenants', 'async'
+        ]
+        for result in results:
+            assert result['polls'] > 0
+            assert result['api_requests'] >= result['polls'], (
+                'Каждый опрос должен доходить до заглушки API.'
+            )
+            assert result['telegram_requests'] > 0, (
+                'Сообщения должны отправляться в заглушку Telegram.'
+            )
+        assert 'engine' in polling_module.format_results(results)
+
+    def test_percentile(self, polling_module):
+        values = list(range(101))
+        assert polling_module.percentile(values, 0.5) == 50
+        assert polling_module.percentile(values, 0.99) == 99
+        assert polling_module.percentile([], 0.5) == 0.0
+
+    def test_validation_benchmark_smoke(self):
+        from benchmarks import validation
+        result = validation.run_benchmarks(payload_size=2, number=10)
+        assert result['legacy_ns'] > 0 and result['compiled_ns'] > 0
+
+    def test_parse_importtime(self):
+        from benchmarks import startup
+        timings = startup.parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   time\n'
+            'import time:       400 |        520 | homework\n'
+        )
+        assert timings == {'time': (120, 120), 'homework': (400, 520)}
+        assert startup.total(timings, {'time': (100, 100)}) == 400
+
+    def test_startup_benchmark_smoke(self):
+        from benchmarks import startup
+        result, = startup.run_benchmarks(['schema'], repeat=1)
+        assert 0 < result['import_ms'] < result['with_deferred_ms']
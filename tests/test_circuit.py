@@ -0,0 +1,100 @@
+import pytest
+import requests
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def circuit_module():
+    import circuit
+    return circuit
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def api_breaker(monkeypatch, circuit_module, clock):
+    breaker = circuit_module.CircuitBreaker(
+        'practicum_api', circuit_module.is_api_failure, failure_threshold=2,
+        reset_timeout=60, clock=clock)
+    monkeypatch.setattr(circuit_module, 'API', breaker)
+    return breaker
+
+
+def fail(breaker, error):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_recovers(self, circuit_module,
+                                                api_breaker, clock):
+        from exceptions import CircuitOpenError, RequestError
+        fail(api_breaker, RequestError('down'))
+        assert api_breaker.state == circuit_module.CLOSED
+        fail(api_breaker, RequestError('down'))
+        assert api_breaker.state == circuit_module.OPEN
+
+        with pytest.raises(CircuitOpenError) as error:
+            api_breaker.before_call()
+        assert error.value.retry_after == 60
+
+        clock.now = 60
+        with api_breaker.guard():
+            with pytest.raises(CircuitOpenError):
+                api_breaker.before_call()
+        assert api_breaker.state == circuit_module.CLOSED, (
+            'Успешный пробный запрос должен замыкать предохранитель.'
+        )
+
+    def test_failed_trial_reopens(self, circuit_module, api_breaker, clock):
+        from exceptions import RequestError
+        fail(api_breaker, RequestError('down'))
+        fail(api_breaker, RequestError('down'))
+        clock.now = 60
+        fail(api_breaker, RequestError('still down'))
+        assert api_breaker.state == circuit_module.OPEN
+        assert api_breaker.retry_at == 120
+
+    def test_client_errors_do_not_trip(self, circuit_module, api_breaker):
+        from exceptions import NotOkResponseStatusExeption
+        for _ in range(3):
+            fail(api_breaker, NotOkResponseStatusExeption(404))
+        assert api_breaker.state == circuit_module.CLOSED
+
+    def test_open_circuit_skips_requests(self, monkeypatch, api_breaker):
+        import homework
+        from exceptions import CircuitOpenError, RequestError
+        calls = []
+
+        def mock_get(*args, **kwargs):
+            calls.append(kwargs)
+            raise requests.ConnectionError('connection refused')
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        for _ in range(2):
+            with pytest.raises(RequestError):
+                homework.request_api_answer(0, {'Authorization': 'OAuth t'})
+        with pytest.raises(CircuitOpenError):
+            homework.request_api_answer(0, {'Authorization': 'OAuth t'})
+        assert len(calls) == 2, (
+            'При разомкнутом предохранителе запрос к API не должен уходить.'
+        )
+
+    def test_open_circuit_does_not_notify_tenant(self, api_breaker):
+        import tenants
+        from exceptions import CircuitOpenError
+        tenant = tenants.parse_tenants_spec('token:111')[0]
+        assert tenants.handle_error(
+            tenant, CircuitOpenError('practicum_api', 30)) == []
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+import utils
+
+
+@pytest.fixture
+def command_bot():
+    import commands
+    import tenants
+    tenant_list = tenants.parse_tenants_spec('token:111')
+    return commands.CommandBot(tenant_list, '1234:abcdefg'), tenant_list[0]
+
+
+class TestCommands:
+
+    def test_status_from_cached_state(self, monkeypatch, command_bot):
+        import commands
+        bot, tenant = command_bot
+        calls = []
+        monkeypatch.setattr(requests, 'get',
+                            lambda *args, **kwargs: calls.append(kwargs))
+        tenant.tracker.update([{'id': 7, 'status': 'reviewing'}])
+        tenant.timestamp = 1000
+
+        answer = bot.answer('111', commands.format_status)
+        assert '7: reviewing' in answer, (
+            'Ответ на /status должен строиться по статусам в памяти.'
+        )
+        assert calls == [], 'Команда не должна запрашивать API.'
+
+    def test_history_lists_sent_messages(self, command_bot,
+                                         random_timestamp):
+        import commands
+        import tenants
+        bot, tenant = command_bot
+        assert bot.answer(111, commands.format_history) == (
+            'Изменений статусов пока не было.'
+        )
+        tenants.handle_response(tenant, {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': random_timestamp,
+        })
+        assert 'hw1' in bot.answer(111, commands.format_history)
+
+    def test_unknown_chat(self, command_bot):
+        import commands
+        bot, _ = command_bot
+        assert bot.answer(222, commands.format_status) == (
+            commands.UNKNOWN_CHAT
+        )
+
+    def test_callback_replies_to_chat(self, command_bot):
+        import commands
+        bot, tenant = command_bot
+        replies = []
+        update = SimpleNamespace(
+            effective_chat=SimpleNamespace(id=111),
+            effective_message=SimpleNamespace(reply_text=replies.append),
+        )
+        bot.make_callback(commands.pause)(update, None)
+        assert tenant.paused and len(replies) == 1
+        bot.make_callback(commands.resume)(update, None)
+        assert not tenant.paused
+
+    def test_paused_tenant_is_not_polled(self, monkeypatch, command_bot):
+        import tenants
+        _, tenant = command_bot
+        calls = []
+        monkeypatch.setattr(requests, 'get',
+                            lambda *args, **kwargs: calls.append(kwargs))
+        tenant.paused = True
+        scheduler = tenants.TenantScheduler(utils.MockTelegramBot(),
+                                            [tenant], clock=lambda: 0)
+        assert scheduler.run_pending() == 0
+        assert calls == [], 'Приостановленный тенант не должен опрашиваться.'
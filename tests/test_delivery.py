@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+import telegram
+import utils
+
+
+@pytest.fixture
+def delivery_module():
+    import delivery
+    return delivery
+
+
+@pytest.fixture(autouse=True)
+def telegram_breaker(monkeypatch):
+    import circuit
+    breaker = circuit.CircuitBreaker('telegram', circuit.is_telegram_failure,
+                                     failure_threshold=5, reset_timeout=0.1)
+    monkeypatch.setattr(circuit, 'TELEGRAM', breaker)
+    return breaker
+
+
+class RecordingBot(utils.MockTelegramBot):
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+class TestDeliveryQueue:
+
+    def test_messages_for_chat_are_coalesced(self, delivery_module):
+        bot = RecordingBot()
+        queue = delivery_module.DeliveryQueue(bot, chat_rate=100)
+        for text in ('first', 'second', 'third'):
+            queue.put(1, text)
+        queue.put(2, 'other')
+        queue.start()
+        assert queue.stop(timeout=1)
+        assert bot.sent == [(1, 'first\n\nsecond\n\nthird'), (2, 'other')], (
+            'Сообщения для одного чата должны склеиваться в одно.'
+        )
+        assert queue.depth == 0
+
+    def test_coalesce_respects_length_limit(self, delivery_module):
+        chunks = delivery_module.coalesce(['a' * 3, 'b' * 3, 'c' * 3],
+                                          limit=8)
+        assert chunks == ['aaa\n\nbbb', 'ccc']
+
+    def test_retry_after_and_network_errors_are_retried(
+            self, delivery_module):
+        bot = RecordingBot(errors=[
+            telegram.error.RetryAfter(0.01),
+            telegram.error.NetworkError('connection reset'),
+        ])
+        queue = delivery_module.DeliveryQueue(bot, chat_rate=100,
+                                              retry_backoff=0.01).start()
+        queue.put(1, 'status')
+        assert queue.stop(timeout=1)
+        assert bot.sent == [(1, 'status')], (
+            'Сообщение должно быть доставлено после повторов.'
+        )
+
+    def test_gives_up_after_max_retries(self, delivery_module, caplog):
+        bot = RecordingBot(errors=[telegram.error.TimedOut()] * 3)
+        queue = delivery_module.DeliveryQueue(bot, chat_rate=100,
+                                              max_retries=2,
+                                              retry_backoff=0.01).start()
+        queue.put(1, 'status')
+        with caplog.at_level(logging.ERROR):
+            assert queue.stop(timeout=1)
+        assert bot.sent == []
+        assert any(record.levelno == logging.ERROR
+                   for record in caplog.records)
+
+    def test_open_circuit_postpones_messages(self, delivery_module,
+                                             telegram_breaker):
+        bot = RecordingBot()
+        for _ in range(telegram_breaker.failure_threshold):
+            telegram_breaker.record_failure()
+        queue = delivery_module.DeliveryQueue(bot, chat_rate=100,
+                                              max_retries=0,
+                                              retry_backoff=0.01).start()
+        queue.put(1, 'status')
+        assert bot.sent == []
+        assert queue.stop(timeout=1)
+        assert bot.sent == [(1, 'status')], (
+            'Пока предохранитель разомкнут, сообщение должно ждать в '
+            'очереди, а не теряться.'
+        )
+
+    def test_token_bucket(self, delivery_module):
+        bucket = delivery_module.TokenBucket(rate=1, capacity=2, now=0)
+        bucket.consume(0)
+        bucket.consume(0)
+        assert bucket.wait_time(0) == 1
+        assert bucket.wait_time(0.5) == 0.5
+        assert bucket.wait_time(1) == 0
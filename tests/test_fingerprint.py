@@ -0,0 +1,153 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+
+
+@pytest.fixture
+def fingerprint_module():
+    import fingerprint
+    return fingerprint
+
+
+class RawResponse:
+    def __init__(self, data, status_code=HTTPStatus.OK, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode()
+        self.headers = headers or {}
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+def api_data(current_date, status='reviewing'):
+    return {
+        'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': status}],
+        'current_date': current_date,
+    }
+
+
+class TestFingerprint:
+
+    def test_digest_ignores_current_date(self, fingerprint_module):
+        first, first_date = fingerprint_module.digest(
+            json.dumps(api_data(100)).encode())
+        second, second_date = fingerprint_module.digest(
+            json.dumps(api_data(200)).encode())
+        other, _ = fingerprint_module.digest(
+            json.dumps(api_data(200, 'approved')).encode())
+        assert first == second, (
+            'Отпечаток не должен зависеть от `current_date`.'
+        )
+        assert (first_date, second_date) == (100, 200)
+        assert other != first
+
+    def test_identical_payload_skips_decoding(self, monkeypatch,
+                                              homework_module):
+        answers = [RawResponse(api_data(100)), RawResponse(api_data(200))]
+        monkeypatch.setattr(requests, 'get',
+                            lambda *args, **kwargs: answers.pop(0))
+        cache = homework_module.fingerprint.ResponseCache()
+        headers = homework_module.make_headers('token')
+
+        first = homework_module.request_api_answer(0, headers, cache)
+        second_answer = answers[0]
+        second = homework_module.request_api_answer(100, headers, cache)
+
+        assert not homework_module.fingerprint.is_unchanged(first)
+        assert homework_module.fingerprint.is_unchanged(second)
+        assert second_answer.decoded == 0, (
+            'Совпавший с предыдущим ответ не должен разбираться заново.'
+        )
+        assert second['current_date'] == 200
+        assert second['homeworks'] is first['homeworks']
+
+    def test_not_modified_uses_validators(self, monkeypatch,
+                                          homework_module):
+        sent_headers = []
+        answers = [
+            RawResponse(api_data(100), headers={'ETag': '"v1"'}),
+            RawResponse({}, status_code=HTTPStatus.NOT_MODIFIED),
+        ]
+
+        def mock_get(*args, **kwargs):
+            sent_headers.append(kwargs['headers'])
+            return answers.pop(0)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        cache = homework_module.fingerprint.ResponseCache()
+        headers = homework_module.make_headers('token')
+        homework_module.request_api_answer(0, headers, cache)
+        result = homework_module.request_api_answer(100, headers, cache)
+
+        assert sent_headers[1]['If-None-Match'] == '"v1"'
+        assert result['current_date'] == 100
+        assert homework_module.fingerprint.is_unchanged(result)
+
+    def test_bad_homework_does_not_block_others(self, monkeypatch,
+                                                homework_module):
+        tracker = homework_module.StatusTracker({'0': 'approved'})
+        sent = []
+        response = {
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 1,
+        }
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, text: sent.append(text))
+        with pytest.raises(KeyError):
+            homework_module.notify_changes(None, tracker, response)
+        assert len(sent) == 1
+        assert tracker.statuses == {'0': 'approved', '1': 'approved'}
+
+    def test_shared_token_notifies_every_chat(self, monkeypatch,
+                                              homework_module):
+        import tenants
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            RawResponse(api_data(100))))
+        monkeypatch.setattr(homework_module, 'RESPONSE_CACHE',
+                            homework_module.fingerprint.ResponseCache())
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(chat_id)
+
+        for tenant in tenants.parse_tenants_spec('tok:1;tok:2'):
+            tenants.poll_tenant(Bot(), tenant)
+        assert homework_module.RESPONSE_CACHE.hits == 1
+        assert sent == ['1', '2'], (
+            'Ответ из кэша должен сверяться со статусами каждого тенанта, '
+            'даже если токен у них общий.'
+        )
+
+    def test_cached_response_retries_failed_processing(self, monkeypatch,
+                                                       homework_module):
+        import tenants
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            RawResponse(api_data(100))))
+        monkeypatch.setattr(homework_module, 'RESPONSE_CACHE',
+                            homework_module.fingerprint.ResponseCache())
+        tenant, = tenants.parse_tenants_spec('tok:1')
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        class BrokenLog:
+            def record(self, *args):
+                raise RuntimeError('database is locked')
+
+        tenants.poll_tenant(Bot(), tenant, log=BrokenLog())
+        assert len(tenant.tracker) == 0
+        tenants.poll_tenant(Bot(), tenant)
+        assert len(sent) == 2 and sent[1].startswith(
+            'Изменился статус проверки работы "hw"'), (
+            'Сбой обработки ответа не должен скрываться кэшем.'
+        )
@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.fixture
+def history_module():
+    import history
+    return history
+
+
+@pytest.fixture
+def log(tmp_path, history_module):
+    log = history_module.TransitionLog(str(tmp_path / 'state.sqlite3'))
+    yield log
+    log.close()
+
+
+class TestHistory:
+
+    def test_changed_at(self, history_module):
+        assert history_module.changed_at(
+            {'date_updated': '2022-01-01T00:00:00Z'}) == 1640995200
+        assert history_module.changed_at({}, default=123) == 123
+        assert history_module.changed_at(
+            {'date_updated': 'вчера'}, default=5) == 5
+
+    def test_timeline(self, log):
+        log.record(1, [{'id': 7, 'homework_name': 'hw', 'status': 'reviewing',
+                        'date_updated': '2022-01-01T00:00:00Z'}], {})
+        log.record(1, [{'id': 7, 'homework_name': 'hw', 'status': 'approved',
+                        'date_updated': '2022-01-02T00:00:00Z'}],
+                   {'7': 'reviewing'})
+        log.record(1, [{'id': 7, 'homework_name': 'hw', 'status': 'approved',
+                        'date_updated': '2022-01-02T00:00:00Z'}],
+                   {'7': 'reviewing'})
+        timeline = log.timeline(1, 7)
+        assert [(item.old_status, item.status) for item in timeline] == [
+            (None, 'reviewing'), ('reviewing', 'approved')
+        ], 'Повторно найденная смена статуса не должна дублироваться.'
+        assert timeline[1].changed_at - timeline[0].changed_at == 86400
+
+    def test_between(self, log):
+        for number in range(10):
+            log.record(number % 2, [{'id': number, 'status': 'reviewing'}],
+                       {}, default_time=number * 100)
+        found = log.between(200, 700, chat_id=0, batch_size=2)
+        assert [item.homework for item in found] == ['2', '4', '6']
+        assert len(list(log.between(0, 1000))) == 10
+
+    def test_handle_response_records_transitions(self, log):
+        import tenants
+        tenant, = tenants.parse_tenants_spec('token:1')
+        tenants.handle_response(tenant, {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': 1000,
+        }, log)
+        item, = log.timeline(1, 1)
+        assert (item.status, item.changed_at) == ('approved', 1000)
+
+    def test_log_and_checkpoints_share_file(self, tmp_path, history_module):
+        import state_store
+        import tenants
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_store.StateStore(path, busy_timeout=0.1)
+        log = history_module.TransitionLog(path, busy_timeout=0.1)
+        tenant, = tenants.parse_tenants_spec('token:1')
+        sent = []
+
+        class Queue:
+            def put(self, chat_id, message):
+                sent.append(message)
+
+        for number, status in enumerate(('reviewing', 'approved')):
+            tenants.process_answer(None, tenant, {
+                'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                               'status': status}],
+                'current_date': 1000 + number,
+            }, store, Queue(), log)
+        assert len(sent) == 2
+        assert store.load(tenants.state_key(tenant)).timestamp == 1001, (
+            'Журнал не должен блокировать сохранение контрольных точек '
+            'в том же файле.'
+        )
+        assert [item.status for item in log.timeline(1, 1)] == [
+            'reviewing', 'approved'
+        ]
+        log.close()
+        store.close()
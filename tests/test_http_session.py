@@ -0,0 +1,115 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SlowKeepAliveHandler(KeepAliveHandler):
+
+    def do_GET(self):
+        time.sleep(0.05)
+        super().do_GET()
+
+
+@pytest.fixture
+def local_endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True,
+                              kwargs={'poll_interval': 0.05})
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http_session_module():
+    import http_session
+    yield http_session
+    http_session.close_session()
+
+
+class TestHttpSession:
+
+    def test_connection_is_reused(self, local_endpoint, http_session_module):
+        session = http_session_module.PooledSession()
+        for _ in range(3):
+            assert session.get(local_endpoint).status_code == 200
+        stats = session.connection_stats()
+        assert stats == {'requests': 3, 'connections': 1, 'reused': 2}, (
+            'Сессия должна переиспользовать соединение между запросами.'
+        )
+        session.close()
+
+    def test_default_timeout(self, http_session_module):
+        session = http_session_module.PooledSession(timeout=(1, 2))
+        sent = {}
+
+        def fake_request(method, url, **kwargs):
+            sent.update(kwargs)
+
+        session.send = lambda request, **kwargs: fake_request(
+            request.method, request.url, **kwargs)
+        session.get('http://127.0.0.1:1/')
+        assert sent['timeout'] == (1, 2)
+
+    def test_get_api_answer_uses_shared_session(
+            self, monkeypatch, local_endpoint, homework_module,
+            http_session_module):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_endpoint)
+        monkeypatch.setattr(homework_module, 'HTTP_KEEP_ALIVE', True)
+        for _ in range(2):
+            homework_module.get_api_answer(0)
+        stats = http_session_module.get_session().connection_stats()
+        assert stats['reused'] == 1
+
+    def test_batch_fits_connection_pool(self, monkeypatch, caplog,
+                                        homework_module,
+                                        http_session_module):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), SlowKeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True,
+                         kwargs={'poll_interval': 0.05}).start()
+        monkeypatch.setattr(homework_module, 'ENDPOINT',
+                            f'http://127.0.0.1:{server.server_address[1]}/')
+        monkeypatch.setattr(homework_module, 'HTTP_KEEP_ALIVE', True)
+        monkeypatch.setattr(http_session_module, '_session',
+                            http_session_module.PooledSession(
+                                pool_maxsize=3))
+        tokens = [f'token{number}' for number in range(9)]
+        with caplog.at_level(logging.WARNING, logger='urllib3'):
+            for _ in range(2):
+                answers = homework_module.get_api_answers(tokens, {},
+                                                          max_workers=16)
+                assert all(isinstance(answer, dict)
+                           for answer in answers.values())
+        server.shutdown()
+        server.server_close()
+        stats = http_session_module.get_session().connection_stats()
+        assert stats['connections'] <= 3, (
+            'Пачка запросов не должна открывать соединений больше, чем '
+            'держит пул сессии.'
+        )
+        assert 'Connection pool is full' not in caplog.text
+
+    def test_pool_defaults_to_batch_workers(self, homework_module,
+                                            http_session_module):
+        assert http_session_module.POOL_MAXSIZE == (
+            homework_module.BATCH_WORKERS)
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def lazy_module():
+    import lazy
+    return lazy
+
+
+class TestLazy:
+
+    def test_module_loaded_on_first_access(self, lazy_module):
+        module = lazy_module.LazyModule('colorsys')
+        assert not module.loaded
+        assert module.rgb_to_hsv(0, 0, 0) == (0.0, 0.0, 0.0)
+        assert module.loaded
+
+    def test_patched_attribute_is_visible(self, monkeypatch, lazy_module):
+        import colorsys
+        module = lazy_module.LazyModule('colorsys')
+        monkeypatch.setattr(colorsys, 'ONE_THIRD', 0.5)
+        assert module.ONE_THIRD == 0.5
+
+    def test_homework_import_defers_dependencies(self):
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, homework; '
+             'print(*sorted({"requests", "telegram"} & set(sys.modules)))'],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip() == '', (
+            'Импорт homework не должен импортировать requests и telegram.'
+        )
@@ -0,0 +1,122 @@
+import inspect
+import os
+import signal
+import threading
+import time
+
+import pytest
+import requests
+import telegram
+import utils
+
+
+@pytest.fixture
+def lifecycle_module():
+    import lifecycle
+    return lifecycle
+
+
+class TestLifecycle:
+
+    def test_signal_interrupts_sleep(self, lifecycle_module):
+        previous = signal.getsignal(signal.SIGTERM)
+        timer = threading.Timer(
+            0.1, os.kill, args=(os.getpid(), signal.SIGTERM))
+        started = time.monotonic()
+        with lifecycle_module.Lifecycle() as signals:
+            timer.start()
+            with signals.interruptible():
+                time.sleep(1)
+        assert time.monotonic() - started < 0.9, (
+            'Сигнал должен прерывать ожидание между циклами.'
+        )
+        assert signals.stopping
+        assert signals.delay(600) == 0
+        assert signal.getsignal(signal.SIGTERM) is previous, (
+            'Прежний обработчик сигнала должен восстанавливаться.'
+        )
+
+    def test_reload_flag(self, lifecycle_module):
+        with lifecycle_module.Lifecycle() as signals:
+            signal.raise_signal(signal.SIGHUP)
+            assert not signals.stopping
+            assert signals.take_reload()
+            assert not signals.take_reload()
+
+    def test_main_stops_after_cycle(self, monkeypatch, tmp_path,
+                                    random_timestamp):
+        import homework
+        import state_store
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '12345')
+        monkeypatch.setattr(homework, 'STATE_FILE',
+                            str(tmp_path / 'state.sqlite3'))
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(random_timestamp=random_timestamp)))
+        monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            signal.raise_signal(signal.SIGTERM)
+
+        monkeypatch.setattr(time, 'sleep', sleep)
+        # test_bot оборачивает main в with_timeout прямо в модуле.
+        inspect.unwrap(homework.main)()
+
+        assert sleeps == [600], 'После SIGTERM новый цикл не начинается.'
+        store = state_store.open_store(homework.STATE_FILE)
+        assert store.load('12345')[0] == random_timestamp, (
+            'Состояние должно сохраняться до завершения работы.'
+        )
+        store.close()
+
+    def test_main_sighup_does_not_stop_sleeping(self, monkeypatch,
+                                                random_timestamp):
+        import homework
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '12345')
+        monkeypatch.setattr(homework, 'STATE_FILE', None)
+        monkeypatch.setattr(homework, 'RETRY_PERIOD', 600)
+        monkeypatch.setattr(homework.scheduling, 'POLLING_POLICY', 'fixed')
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(random_timestamp=random_timestamp)))
+        monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 1:
+                signal.raise_signal(signal.SIGHUP)
+            elif len(sleeps) == 4:
+                signal.raise_signal(signal.SIGTERM)
+
+        monkeypatch.setattr(time, 'sleep', sleep)
+        inspect.unwrap(homework.main)()
+
+        assert sleeps == [600, 600, 600, 600], (
+            'После SIGHUP пауза между циклами не должна обнуляться.'
+        )
+
+    def test_scheduler_reload_keeps_due_times(self, lifecycle_module):
+        import tenants
+        now = [0.0]
+
+        def clock():
+            return now[0]
+
+        old = tenants.parse_tenants_spec('t1:1;t2:2')
+        scheduler = tenants.TenantScheduler(utils.MockTelegramBot(), old,
+                                            period=600, clock=clock)
+        due = {tenant.name: when for when, _, tenant in scheduler._queue}
+        added, = tenants.parse_tenants_spec('t3:3')
+        now[0] = 100
+        scheduler.reload([old[1], added])
+
+        assert scheduler.tenants[0] is added, (
+            'Новый тенант должен опрашиваться сразу.'
+        )
+        assert {tenant.name: when for when, _, tenant in scheduler._queue
+                } == {added.name: 100, old[1].name: due[old[1].name]}
@@ -0,0 +1,72 @@
+import io
+import json
+import logging
+
+import pytest
+import requests
+import utils
+
+BOT_TOKEN = '123456789:AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw'
+
+
+@pytest.fixture
+def log_pipeline_module():
+    import log_pipeline
+    yield log_pipeline
+    log_pipeline.shutdown()
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('test_log_pipeline')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    yield logger
+    logger.handlers.clear()
+
+
+class TestLogPipeline:
+
+    def test_redact_tokens(self, log_pipeline_module):
+        text = log_pipeline_module.redact(
+            f"{{'Authorization': 'OAuth y0_secret'}} /bot{BOT_TOKEN}/send "
+            'webhook s3cret', secrets=('s3cret',))
+        assert 'y0_secret' not in text and BOT_TOKEN not in text
+        assert 's3cret' not in text
+        assert 'OAuth ***' in text
+
+    def test_json_output(self, log_pipeline_module, logger):
+        stream = io.StringIO()
+        logger.handlers = log_pipeline_module.handlers(
+            stream, log_format='json', use_queue=False)
+        logger.warning('Заголовки %s', {'Authorization': 'OAuth abc'})
+        entry = json.loads(stream.getvalue())
+        assert entry['level'] == 'WARNING'
+        assert entry['message'] == "Заголовки {'Authorization': 'OAuth ***'}"
+
+    def test_queue_formats_in_listener(self, log_pipeline_module, logger):
+        stream = io.StringIO()
+        logger.handlers = log_pipeline_module.handlers(stream,
+                                                       use_queue=True)
+        handler, = logger.handlers
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 1,
+                                   'Опрос %s', ('tenant',), None)
+        assert handler.prepare(record).msg == 'Опрос %s', (
+            'Сообщение должно форматироваться в потоке-слушателе.'
+        )
+        logger.info('Опрос %s', 'tenant')
+        log_pipeline_module.shutdown()
+        assert 'Опрос tenant' in stream.getvalue()
+
+    def test_request_log_has_no_token(self, monkeypatch, caplog,
+                                      random_timestamp):
+        import homework
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(random_timestamp=random_timestamp)))
+        with caplog.at_level(logging.DEBUG):
+            homework.request_api_answer(0, {'Authorization': 'OAuth y0_tok'})
+        assert caplog.records
+        assert not any('y0_tok' in record.getMessage()
+                       for record in caplog.records), (
+            'Токен не должен попадать в лог запроса.'
+        )
@@ -0,0 +1,80 @@
+import urllib.request
+
+import pytest
+import requests
+import utils
+
+
+@pytest.fixture
+def metrics_module():
+    import metrics
+    return metrics
+
+
+class TestMetrics:
+
+    def test_render_exposition(self, metrics_module):
+        registry = metrics_module.Registry()
+        histogram = registry.register(metrics_module.Histogram(
+            'test_seconds', 'Тест.', buckets=(0.1, 1)))
+        counter = registry.register(metrics_module.Counter(
+            'test_errors_total', 'Тест.', ('exception',)))
+        gauge = registry.register(metrics_module.Gauge('test_depth', 'Тест.'))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        counter.inc(exception='RequestError')
+        gauge.set_function(lambda: 3)
+
+        text = registry.render()
+        for line in (
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            'test_seconds_count 3',
+            'test_errors_total{exception="RequestError"} 1',
+            'test_depth 3',
+        ):
+            assert line in text.splitlines(), (
+                f'В выводе метрик нет строки `{line}`.'
+            )
+
+    def test_duplicate_metric_name(self, metrics_module):
+        registry = metrics_module.Registry()
+        registry.register(metrics_module.Gauge('dup', ''))
+        with pytest.raises(ValueError):
+            registry.register(metrics_module.Gauge('dup', ''))
+
+    def test_metrics_endpoint(self, metrics_module):
+        server = metrics_module.start_server(0, host='127.0.0.1',
+                                             poll_interval=0.05)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/metrics') as answer:
+                body = answer.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE homework_api_request_seconds histogram' in body
+
+    def test_api_request_is_measured(self, monkeypatch, homework_module,
+                                     metrics_module, random_timestamp):
+        before = metrics_module.API_REQUEST_SECONDS.count
+        errors_before = metrics_module.ERRORS.value(exception='RequestError')
+
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(random_timestamp=random_timestamp)))
+        homework_module.get_api_answer(0)
+        assert metrics_module.API_REQUEST_SECONDS.count == before + 1
+
+        def broken_get(*args, **kwargs):
+            raise requests.RequestException('boom')
+
+        monkeypatch.setattr(requests, 'get', broken_get)
+        import tenants
+        tenant = tenants.Tenant('t', 'token', 1)
+        tenants.poll_tenant(utils.MockTelegramBot(), tenant)
+        assert metrics_module.ERRORS.value(
+            exception='RequestError') == errors_before + 1
@@ -0,0 +1,169 @@
+import inspect
+import time
+
+import pytest
+import requests
+import telegram
+import utils
+
+
+@pytest.fixture
+def outbox_module():
+    import outbox
+    return outbox
+
+
+class TestOutbox:
+
+    def test_duplicate_key_is_ignored(self, outbox_module):
+        box = outbox_module.Outbox()
+        assert box.add(1, 'first', key='hw:approved')
+        assert not box.add(1, 'again', key='hw:approved')
+        box.commit()
+        assert [entry.message for entry in box.pending()] == ['first']
+
+    def test_drain_stops_on_failure(self, outbox_module):
+        box = outbox_module.Outbox()
+        for number in range(3):
+            box.add(1, f'message {number}')
+        box.commit()
+        sent = []
+
+        def send(chat_id, message):
+            if message == 'message 1':
+                return False
+            sent.append(message)
+
+        assert box.drain(send) == 1
+        assert sent == ['message 0']
+        assert [entry.message for entry in box.pending()] == [
+            'message 1', 'message 2'
+        ], 'Неотправленные сообщения должны остаться в outbox по порядку.'
+
+    def test_undeliverable_message_is_set_aside(self, outbox_module):
+        box = outbox_module.Outbox(max_attempts=2)
+        box.add(1, 'bad request')
+        box.add(1, 'next')
+        box.commit()
+        sent = []
+
+        def send(chat_id, message):
+            if message == 'bad request':
+                return outbox_module.REJECTED
+            sent.append(message)
+
+        assert box.drain(send) == 0
+        assert box.drain(send) == 1
+        assert sent == ['next'], (
+            'Сообщение, которое не уходит `max_attempts` раз, не должно '
+            'задерживать следующие.'
+        )
+        assert box.pending() == []
+
+    def test_transient_failure_does_not_use_attempts(self, outbox_module):
+        box = outbox_module.Outbox(max_attempts=2)
+        box.add(1, 'outage')
+        box.commit()
+        for _ in range(5):
+            assert box.drain(lambda chat_id, message: False) == 0
+        assert [entry.message for entry in box.pending()] == ['outage'], (
+            'Временный сбой Telegram не должен расходовать попытки '
+            'отправки.'
+        )
+
+    @pytest.mark.parametrize('error, result', [
+        (telegram.error.NetworkError('timeout'), False),
+        (telegram.error.RetryAfter(5), False),
+        (telegram.error.BadRequest('Chat not found'), 'rejected'),
+        (telegram.error.Unauthorized('blocked'), 'rejected'),
+    ])
+    def test_send_message_to_result(self, error, result):
+        import homework
+
+        class FailingBot(utils.MockTelegramBot):
+            def send_message(self, chat_id, text):
+                raise error
+
+        assert homework.send_message_to(FailingBot(), 1, 'text') == result
+
+    def test_send_message_to_open_circuit(self, monkeypatch):
+        import circuit
+        import homework
+        breaker = circuit.CircuitBreaker('telegram',
+                                         circuit.is_telegram_failure,
+                                         failure_threshold=1)
+        breaker.record_failure()
+        monkeypatch.setattr(circuit, 'TELEGRAM', breaker)
+        assert homework.send_message_to(utils.MockTelegramBot(), 1,
+                                        'text') is False, (
+            'Сообщение, которое не отправлялось из-за разомкнутого '
+            'предохранителя, не должно считаться отвергнутым.'
+        )
+
+    def test_deliver_pending_uses_entry_chat(self, monkeypatch,
+                                             outbox_module):
+        import homework
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '12345')
+        box = outbox_module.Outbox()
+        box.add('12345', 'own chat')
+        box.add('777', 'other chat')
+        box.commit()
+        bot = utils.MockTelegramBot()
+        chats = []
+        bot.send_message = lambda chat_id, text: chats.append(chat_id)
+        assert homework.deliver_pending(bot, box) == 2
+        assert chats == ['12345', '777'], (
+            'Сообщение должно уходить в чат, для которого оно записано.'
+        )
+
+    def test_pending_survive_restart(self, tmp_path, outbox_module):
+        path = str(tmp_path / 'state.sqlite3')
+        box = outbox_module.Outbox(path)
+        box.add(1, 'delivered', key='a')
+        box.add(1, 'pending', key='b')
+        box.commit()
+        box.mark_delivered(['a'])
+        box.close()
+
+        box = outbox_module.Outbox(path)
+        assert [entry.message for entry in box.pending()] == ['pending']
+        assert not box.add(1, 'delivered', key='a'), (
+            'Доставленное сообщение не должно записываться повторно.'
+        )
+        box.close()
+
+    def test_main_retries_failed_send(self, monkeypatch, tmp_path,
+                                      data_with_new_hw_status):
+        import homework
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '12345')
+        monkeypatch.setattr(homework, 'STATE_FILE',
+                            str(tmp_path / 'state.sqlite3'))
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(data=data_with_new_hw_status)))
+        attempts = []
+
+        class FlakyBot(utils.MockTelegramBot):
+            def send_message(self, chat_id, text):
+                attempts.append(text)
+                if len(attempts) == 1:
+                    raise telegram.error.NetworkError('timeout')
+
+        monkeypatch.setattr(telegram, 'Bot', FlakyBot)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(time, 'sleep', sleep)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            # test_bot оборачивает main в with_timeout прямо в модуле.
+            inspect.unwrap(homework.main)()
+
+        assert len(attempts) == 2 and attempts[0] == attempts[1], (
+            'Сообщение, не отправленное из-за сбоя Telegram, должно '
+            'уйти в следующем цикле.'
+        )
@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.fixture
+def scheduling_module():
+    import scheduling
+    return scheduling
+
+
+@pytest.fixture
+def policy(scheduling_module):
+    return scheduling_module.AdaptivePolicy(
+        600, reviewing_period=60, max_period=3000, jitter=0.1,
+        rand=lambda: 0.5
+    )
+
+
+class TestAdaptivePolicy:
+
+    def test_base_period_after_change(self, policy):
+        policy.observe(['approved'], changed=True)
+        assert policy.next_delay() == 600, (
+            'После изменения статуса пауза должна быть равна базовой.'
+        )
+
+    def test_reviewing_shortens_interval(self, policy):
+        policy.observe(['reviewing'], changed=False)
+        assert policy.next_delay() == 60
+
+    def test_idle_backoff_with_jitter_and_cap(self, policy):
+        delays = []
+        for _ in range(5):
+            policy.observe([], changed=False)
+            delays.append(policy.next_delay())
+        assert delays == [600, 1260, 2520, 3150, 3150], (
+            'Без изменений пауза должна расти экспоненциально до предела.'
+        )
+
+    def test_backoff_on_request_error(self, policy, scheduling_module):
+        policy.observe_error(scheduling_module.RequestError('timeout'))
+        assert policy.next_delay() == 1260
+        policy.observe([], changed=True)
+        assert policy.next_delay() == 600
+
+    def test_retry_after_is_honoured(self, policy, scheduling_module):
+        error = scheduling_module.NotOkResponseStatusExeption(429, '5000')
+        policy.observe_error(error)
+        assert policy.next_delay() == 5000
+
+    def test_other_errors_keep_base_period(self, policy):
+        policy.observe_error(KeyError('status'))
+        assert policy.next_delay() == 600
+
+    def test_parse_retry_after_http_date(self, scheduling_module):
+        value = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        assert scheduling_module.parse_retry_after(
+            value, now=1445412480 - 30) == 30
+        assert scheduling_module.parse_retry_after('garbage') is None
+
+    def test_make_policy(self, scheduling_module):
+        assert isinstance(scheduling_module.make_policy(600, 'fixed'),
+                          scheduling_module.FixedPolicy)
+        with pytest.raises(ValueError):
+            scheduling_module.make_policy(600, 'unknown')
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def schema_module():
+    import schema
+    return schema
+
+
+class TestSchema:
+
+    def test_missing_keys_are_listed(self, schema_module):
+        validate = schema_module.compile_response_validator()
+        with pytest.raises(schema_module.EmptyResponseAPI) as error:
+            validate({'homeworks': []})
+        assert 'current_date' in str(error.value), (
+            'Текст ошибки должен называть отсутствующий ключ.'
+        )
+
+    def test_render_matches_verdicts(self, schema_module):
+        render = schema_module.compile_status_renderer({'approved': 'Ура!'})
+        assert render({'homework_name': 'hw', 'status': 'approved'}) == (
+            'Изменился статус проверки работы "hw". Ура!'
+        )
+        assert render({'homework_name': 42, 'status': 'approved'}) == (
+            'Изменился статус проверки работы "42". Ура!'
+        )
+
+    @pytest.mark.parametrize('homework, message', [
+        ({'homework_name': 'hw'}, 'status'),
+        ({'status': 'approved'}, 'homework_name'),
+        ({'homework_name': 'hw', 'status': 'unknown'}, 'unknown'),
+        ({'homework_name': '', 'status': 'approved'}, 'homework_name'),
+    ])
+    def test_render_errors(self, schema_module, homework, message):
+        render = schema_module.compile_status_renderer({'approved': 'Ура!'})
+        with pytest.raises(KeyError) as error:
+            render(homework)
+        assert message in str(error.value)
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+import requests
+import telegram
+import utils
+
+
+@pytest.fixture
+def state_store_module():
+    import state_store
+    return state_store
+
+
+class TestStateStore:
+
+    def test_checkpoint_survives_reopen(self, tmp_path, state_store_module):
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_store_module.StateStore(path)
+        assert store.load(12345) == (0, None, {})
+        store.save(12345, 1000198000, None, {'1': 'reviewing'})
+        store.close()
+
+        store = state_store_module.StateStore(path)
+        assert store.load('12345') == (1000198000, None,
+                                       {'1': 'reviewing'}), (
+            'После перезапуска состояние должно читаться из файла.'
+        )
+        store.close()
+
+    def test_stores_share_file(self, tmp_path, state_store_module):
+        path = str(tmp_path / 'state.sqlite3')
+        first = state_store_module.StateStore(path, busy_timeout=0.1)
+        second = state_store_module.StateStore(path, busy_timeout=0.1)
+        first.save(1, 10, 'a')
+        second.save(2, 20, 'b')
+        first.save(1, 30, None)
+        assert second.load(1) == (30, None, {}), (
+            'Сохранение должно сразу фиксироваться и не блокировать '
+            'другие процессы с тем же файлом.'
+        )
+        assert first.load(2) == (20, 'b', {})
+        first.close()
+        second.close()
+
+    def test_null_store(self, state_store_module):
+        store = state_store_module.open_store(None)
+        store.save(1, 10, 'a')
+        assert store.load(1) == (0, None, {})
+
+    def test_main_resumes_from_checkpoint(self, tmp_path, monkeypatch,
+                                          homework_module,
+                                          state_store_module):
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_store_module.StateStore(path)
+        store.save(homework_module.TELEGRAM_CHAT_ID, 1000198000, None,
+                   {'hw123': 'approved'})
+        store.close()
+        monkeypatch.setattr(homework_module, 'STATE_FILE', path)
+
+        from_dates = []
+
+        def mock_get(*args, **kwargs):
+            from_dates.append(kwargs['params']['from_date'])
+            return utils.MockResponseGET(random_timestamp=1000198500, data={
+                'homeworks': [{'homework_name': 'hw123',
+                               'status': 'approved'}],
+                'current_date': 1000198500,
+            })
+
+        def stop_loop(secs):
+            raise utils.BreakInfiniteLoop('break')
+
+        bot = utils.MockTelegramBot()
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(telegram, 'Bot', lambda **kwargs: bot)
+        monkeypatch.setattr(time, 'sleep', stop_loop)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        assert from_dates == [1000198000], (
+            'После перезапуска запрос должен идти от сохранённого timestamp.'
+        )
+        assert not hasattr(bot, 'text'), (
+            'Уже доставленное сообщение не должно отправляться повторно.'
+        )
+        store = state_store_module.StateStore(path)
+        assert store.load(homework_module.TELEGRAM_CHAT_ID)[0] == 1000198500
+        store.close()
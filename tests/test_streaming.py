@@ -0,0 +1,151 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from exceptions import EmptyResponseAPI
+
+PAYLOAD = {
+    'current_date': 1234567890,
+    'homeworks': [
+        {'id': number, 'homework_name': f'hw{number}', 'status': 'approved',
+         'reviewer_comment': 'Отлично! ' * number, 'score': number * 1.5}
+        for number in range(20)
+    ],
+    'extra': [None, True, {'nested': '[]{}'}],
+}
+
+
+def split(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.fixture
+def streaming_module():
+    import streaming
+    return streaming
+
+
+class TestStreaming:
+
+    @pytest.mark.parametrize('size', [1, 3, 7, 4096])
+    def test_matches_json_loads(self, size, streaming_module):
+        data = json.dumps(PAYLOAD, ensure_ascii=False).encode()
+        closed = []
+        response = streaming_module.StreamedResponse(
+            split(data, size), close=lambda: closed.append(True))
+        assert list(response.homeworks()) == PAYLOAD['homeworks']
+        assert response.get('current_date') == PAYLOAD['current_date']
+        assert response.get('extra') == PAYLOAD['extra']
+        assert closed == [True], 'Ответ нужно закрыть после чтения тела.'
+
+    def test_keep_fields(self, streaming_module):
+        data = json.dumps(PAYLOAD).encode()
+        response = streaming_module.StreamedResponse(
+            [data], keep=('id', 'status'))
+        first = next(iter(response.homeworks()))
+        assert first == {'id': 0, 'status': 'approved'}
+        assert response.summary() == [{'status': 'approved'}]
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"homeworks": {}, "current_date": 1}', TypeError),
+        (b'{"homeworks": [1], "current_date": 1}', TypeError),
+        (b'{"homeworks": []}', EmptyResponseAPI),
+        (b'{"homeworks": [{"id": 1}', ValueError),
+    ])
+    def test_invalid_responses(self, body, error, streaming_module):
+        response = streaming_module.StreamedResponse(split(body, 5))
+        with pytest.raises(error):
+            list(response.homeworks())
+
+    def test_cold_start_applies_items_as_read(self, monkeypatch,
+                                              streaming_module):
+        import homework
+        data = json.dumps(PAYLOAD).encode()
+        tracker = homework.StatusTracker()
+        tracked = []
+
+        def chunks():
+            for chunk in split(data, 10):
+                tracked.append(len(tracker))
+                yield chunk
+
+        response = streaming_module.StreamedResponse(chunks())
+        sent = []
+        monkeypatch.setattr(homework, 'send_message',
+                            lambda bot, message: sent.append(message))
+        homework.notify_changes(None, tracker, response)
+        assert 0 < tracked[len(tracked) // 2] < len(PAYLOAD['homeworks']), (
+            'Статусы должны попадать в трекер по мере чтения ответа, а не '
+            'после того, как прочитаны все домашки.'
+        )
+        assert len(sent) == 1
+
+    def test_main_path_streams_full_history(self, monkeypatch,
+                                            streaming_module):
+        import homework
+        data = json.dumps(PAYLOAD).encode()
+        calls = []
+
+        class StreamingResponse:
+            status_code = HTTPStatus.OK
+
+            def iter_content(self, chunk_size):
+                return split(data, 10)
+
+            def close(self):
+                pass
+
+        def mock_get(*args, **kwargs):
+            calls.append(kwargs.get('stream'))
+            return StreamingResponse()
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(homework, 'STREAM_FULL_HISTORY', True)
+        response = homework.get_api_answer(0)
+        assert calls == [True]
+        tracker = homework.StatusTracker()
+        sent = []
+        monkeypatch.setattr(homework, 'send_message',
+                            lambda bot, message: sent.append(message))
+        homeworks, changed = homework.notify_changes(None, tracker, response)
+        assert changed and len(sent) == 1, (
+            'Без контрольной точки бот должен сообщать только о самой '
+            'свежей домашке.'
+        )
+        assert sent[0].startswith('Изменился статус проверки работы "hw0"')
+        assert len(tracker) == 20
+        assert homeworks == [{'status': 'approved'}]
+        assert response.get('current_date') == PAYLOAD['current_date']
+
+    def test_broken_stream_is_request_error(self, monkeypatch,
+                                            streaming_module):
+        import circuit
+        import homework
+        data = json.dumps(PAYLOAD).encode()
+
+        class BrokenResponse:
+            status_code = HTTPStatus.OK
+
+            def iter_content(self, chunk_size):
+                yield data[:100]
+                raise requests.exceptions.ChunkedEncodingError('reset')
+
+            def close(self):
+                pass
+
+        breaker = circuit.CircuitBreaker('practicum_api',
+                                         circuit.is_api_failure)
+        monkeypatch.setattr(circuit, 'API', breaker)
+        monkeypatch.setattr(requests, 'get',
+                            lambda *args, **kwargs: BrokenResponse())
+        monkeypatch.setattr(homework, 'STREAM_FULL_HISTORY', True)
+        response = homework.get_api_answer(0)
+        with pytest.raises(homework.RequestError):
+            list(homework.check_response(response))
+        assert breaker.failures == 1, (
+            'Обрыв соединения при чтении тела должен учитываться '
+            'предохранителем.'
+        )
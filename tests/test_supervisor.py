@@ -0,0 +1,153 @@
+import signal
+import time
+
+import pytest
+
+
+def sleep_forever(shard):
+    time.sleep(60)
+
+
+def slow_shutdown(shard):
+    def drain(signum, frame):
+        time.sleep(0.5)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, drain)
+    time.sleep(60)
+
+
+@pytest.fixture
+def supervisor_module():
+    import supervisor
+    return supervisor
+
+
+@pytest.fixture
+def make_supervisor(supervisor_module):
+    import tenants
+    started = []
+
+    def factory(**kwargs):
+        tenant_list = tenants.parse_tenants_spec(
+            ';'.join(f'token{number}:{number}' for number in range(6)))
+        supervisor = supervisor_module.Supervisor(
+            tenant_list, workers=2, target=sleep_forever, **kwargs)
+        started.append(supervisor.start())
+        return supervisor
+
+    yield factory
+    for supervisor in started:
+        supervisor.stop()
+
+
+def kill(worker):
+    worker.process.kill()
+    worker.process.join()
+
+
+class TestSupervisor:
+
+    def test_ring_moves_only_keys_of_removed_node(self, supervisor_module):
+        ring = supervisor_module.HashRing(range(3))
+        keys = [f'tenant{number}' for number in range(300)]
+        before = {key: ring.node_for(key) for key in keys}
+        assert set(before.values()) == {0, 1, 2}
+
+        ring.remove(1)
+        after = {key: ring.node_for(key) for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+        assert moved and all(before[key] == 1 for key in moved), (
+            'При удалении узла должны переезжать только его тенанты.'
+        )
+
+    def test_dead_worker_is_restarted(self, make_supervisor):
+        supervisor = make_supervisor()
+        assert supervisor.health()['status'] == 'ok'
+        assert sum(len(worker.shard)
+                   for worker in supervisor.workers.values()) == 6
+
+        kill(supervisor.workers[0])
+        assert supervisor.health()['status'] == 'degraded'
+        assert supervisor.check_workers() == 1
+        health = supervisor.health()
+        assert health['status'] == 'ok' and health['alive'] == 2
+        assert health['workers'][0]['restarts'] == 1
+
+    def test_crash_loop_rebalances_tenants(self, make_supervisor):
+        supervisor = make_supervisor(max_restarts=0)
+        kill(supervisor.workers[0])
+        supervisor.check_workers()
+
+        health = supervisor.health()
+        assert [worker['worker'] for worker in health['workers']] == [1]
+        assert health['workers'][0]['tenants'] == 6, (
+            'Тенанты выбывшего процесса должны перейти к остальным.'
+        )
+        assert supervisor.workers[1].alive
+
+    def test_stop_waits_for_workers_together(self, supervisor_module):
+        import tenants
+        tenant_list = tenants.parse_tenants_spec(
+            ';'.join(f'token{number}:{number}' for number in range(12)))
+        supervisor = supervisor_module.Supervisor(
+            tenant_list, workers=3, target=slow_shutdown).start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        supervisor.stop()
+        elapsed = time.monotonic() - started
+        assert elapsed < 1.2, (
+            'Процессы должны останавливаться параллельно, а не по очереди.'
+        )
+        assert not any(worker.alive
+                       for worker in supervisor.workers.values())
+
+    def test_workers_share_state_file(self, tmp_path, supervisor_module):
+        import multiprocessing
+
+        import history
+        import state_store
+        import tenants
+        path = str(tmp_path / 'state.sqlite3')
+        cycles = 20
+
+        class Queue:
+            def put(self, chat_id, message):
+                pass
+
+        def serve(shard):
+            store = state_store.StateStore(path)
+            log = history.TransitionLog(path)
+            for cycle in range(1, cycles + 1):
+                for tenant in shard:
+                    tenants.process_answer(None, tenant, {
+                        'homeworks': [{
+                            'id': 1, 'homework_name': 'hw',
+                            'status': ('reviewing', 'approved')[cycle % 2],
+                        }],
+                        'current_date': cycle,
+                    }, store, Queue(), log)
+            log.close()
+            store.close()
+
+        tenant_list = tenants.parse_tenants_spec(
+            ';'.join(f'token{number}:{number}' for number in range(6)))
+        supervisor = supervisor_module.Supervisor(tenant_list, workers=2)
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=serve, args=(shard,))
+                     for shard in supervisor.assign().values()]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        store = state_store.StateStore(path)
+        log = history.TransitionLog(path)
+        assert [store.load(tenants.state_key(tenant)).timestamp
+                for tenant in tenant_list] == [cycles] * 6, (
+            'Процессы с общим `STATE_FILE` не должны мешать друг другу '
+            'сохранять контрольные точки.'
+        )
+        assert len(list(log.between(0, cycles + 1))) == 6 * cycles
+        log.close()
+        store.close()
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    import homework
+    import templates
+    (tmp_path / 'en.json').write_text(json.dumps({
+        'message': 'Status of "{homework_name}" changed. {verdict}',
+        'verdicts': {'approved': 'Approved!'},
+    }))
+    (tmp_path / 'ru.json').write_text(json.dumps({
+        'verdicts': {'on_hold': 'Проверка приостановлена.'},
+    }))
+    return templates.Catalog(homework.HOMEWORK_VERDICTS,
+                             directory=str(tmp_path))
+
+
+class TestTemplates:
+
+    def test_default_locale_matches_parse_status(self, catalog):
+        import homework
+        for status in homework.HOMEWORK_VERDICTS:
+            homework_data = {'homework_name': 'hw', 'status': status}
+            assert catalog.render_homework(homework_data) == (
+                homework.parse_status(homework_data)
+            )
+
+    def test_locale_and_fallback(self, catalog):
+        approved = {'homework_name': 'hw', 'status': 'approved'}
+        rejected = {'homework_name': 'hw', 'status': 'rejected'}
+        assert catalog.render_homework(approved, 'en') == (
+            'Status of "hw" changed. Approved!'
+        )
+        assert catalog.render_homework(rejected, 'en').startswith(
+            'Изменился статус'
+        ), 'Статус без перевода должен браться из локали по умолчанию.'
+        assert catalog.render_homework(approved, '../en').startswith(
+            'Изменился статус'
+        )
+
+    def test_new_status_from_file(self, catalog):
+        assert catalog.render_homework(
+            {'homework_name': 'hw', 'status': 'on_hold'}, 'en'
+        ).endswith('Проверка приостановлена.')
+        with pytest.raises(KeyError):
+            catalog.render_homework({'homework_name': 'hw',
+                                     'status': 'unknown'})
+
+    def test_rendered_messages_are_cached(self, catalog):
+        approved = {'homework_name': 'hw', 'status': 'approved'}
+        for _ in range(3):
+            catalog.render_homework(approved, 'en')
+        info = catalog.render.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+
+    def test_tenant_locale(self, tmp_path, random_timestamp):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'a', 'chat_id': 1, 'locale': 'en'},
+        ]))
+        tenant, = tenants.load_tenants(path=str(path))
+        messages = tenants.handle_response(tenant, {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': random_timestamp,
+        })
+        assert messages == [
+            'The review status of "hw" has changed. '
+            'The reviewer approved the work. Hooray!'
+        ]
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+import requests
+import utils
+
+
+@pytest.fixture
+def tenants_module():
+    import tenants
+    return tenants
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTenants:
+
+    def test_parse_tenants_spec(self, tenants_module):
+        tenants = tenants_module.parse_tenants_spec('tok1:111;tok2:222;')
+        assert [tenant.chat_id for tenant in tenants] == ['111', '222'], (
+            'Проверьте разбор строки `TENANTS`.'
+        )
+        assert tenants[0].headers == {'Authorization': 'OAuth tok1'}
+
+    def test_parse_tenants_spec_invalid(self, tenants_module):
+        with pytest.raises(tenants_module.TenantConfigError):
+            tenants_module.parse_tenants_spec('token-without-chat')
+
+    def test_read_tenants_file(self, tmp_path, tenants_module):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'anna', 'practicum_token': 'a', 'chat_id': 1},
+            {'practicum_token': 'b', 'chat_id': 2},
+        ]))
+        tenants = tenants_module.load_tenants(path=str(path))
+        assert [tenant.name for tenant in tenants] == ['anna', 2]
+
+    def test_scheduler_polls_each_tenant_with_own_token(
+            self, monkeypatch, random_timestamp, tenants_module):
+        seen_tokens = []
+
+        def mock_get(*args, **kwargs):
+            seen_tokens.append(kwargs['headers']['Authorization'])
+            return utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data={
+                    'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                    'current_date': random_timestamp,
+                }
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        bot = utils.MockTelegramBot()
+        sent = []
+        bot.send_message = lambda chat_id, text: sent.append(chat_id)
+        clock = FakeClock()
+        tenants = tenants_module.parse_tenants_spec('t1:1;t2:2')
+        scheduler = tenants_module.TenantScheduler(bot, tenants, period=600,
+                                                   clock=clock)
+
+        assert scheduler.run_pending() == 1, (
+            'Первые опросы тенантов должны быть распределены по периоду.'
+        )
+        clock.now = 300
+        assert scheduler.run_pending() == 1
+        assert seen_tokens == ['OAuth t1', 'OAuth t2']
+        assert sent == ['1', '2']
+        assert all(tenant.timestamp == random_timestamp for tenant in tenants)
+
+        clock.now = 600
+        scheduler.run_pending()
+        assert sent == ['1', '2'], (
+            'Повторное сообщение с тем же статусом не должно отправляться.'
+        )
+
+    def test_tenants_sharing_chat_keep_own_state(self, tmp_path,
+                                                 tenants_module):
+        import state_store
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        first, second = tenants_module.parse_tenants_spec('tok1:7;tok2:7')
+
+        class Queue:
+            def put(self, chat_id, message):
+                pass
+
+        for number, tenant in enumerate((first, second), start=1):
+            tenants_module.process_answer(None, tenant, {
+                'homeworks': [{'id': number, 'homework_name': f'hw{number}',
+                               'status': 'approved'}],
+                'current_date': 100 * number,
+            }, store, Queue())
+        restored = tenants_module.parse_tenants_spec('tok1:7;tok2:7')
+        tenants_module.restore_state(store, restored)
+        store.close()
+        assert [tenant.timestamp for tenant in restored] == [100, 200], (
+            'Тенанты с общим чатом не должны затирать контрольные точки '
+            'друг друга.'
+        )
+        assert [tenant.tracker.statuses for tenant in restored] == [
+            {'1': 'approved'}, {'2': 'approved'}
+        ]
+
+    def test_poll_tenant_sets_timeout(self, monkeypatch, random_timestamp,
+                                      tenants_module):
+        timeouts = []
+
+        def mock_get(*args, **kwargs):
+            timeouts.append(kwargs.get('timeout'))
+            return utils.MockResponseGET(random_timestamp=random_timestamp)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        tenant, = tenants_module.parse_tenants_spec('t1:1')
+        tenants_module.poll_tenant(utils.MockTelegramBot(), tenant)
+        assert timeouts == [tenants_module.homework.BATCH_TIMEOUT], (
+            'Запрос одного тенанта тоже должен ограничиваться таймаутом.'
+        )
+
+    def test_reviewing_period_with_empty_follow_up_responses(
+            self, tenants_module):
+        tenant, = tenants_module.parse_tenants_spec('t1:1')
+        tenant.policy = tenants_module.scheduling.AdaptivePolicy(
+            600, reviewing_period=120, jitter=0)
+        tenants_module.handle_response(tenant, {
+            'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': 'reviewing'}],
+            'current_date': 1,
+        })
+        delays = []
+        for current_date in range(2, 6):
+            tenants_module.handle_response(
+                tenant, {'homeworks': [], 'current_date': current_date})
+            delays.append(tenant.policy.next_delay())
+        assert delays == [120] * 4, (
+            'Пока домашка на проверке, пустые ответы API не должны '
+            'увеличивать паузу.'
+        )
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+import requests
+import telegram
+import utils
+
+
+@pytest.fixture
+def tracker_module():
+    import tracker
+    return tracker
+
+
+class TestStatusTracker:
+
+    def test_changes_in_chronological_order(self, tracker_module):
+        tracker = tracker_module.StatusTracker({'1': 'reviewing'})
+        homeworks = [
+            {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+        ]
+        changes = tracker.changes(homeworks)
+        assert [hw['id'] for hw in changes] == [2, 3], (
+            'Должны возвращаться только изменившиеся домашки, '
+            'от старых к новым.'
+        )
+        assert len(tracker) == 1, (
+            '`changes` не должен менять состояние трекера.'
+        )
+        tracker.update(changes)
+        assert tracker.changes(homeworks) == []
+        assert tracker.statuses == {
+            '1': 'reviewing', '2': 'approved', '3': 'reviewing'
+        }
+
+    def test_key_falls_back_to_name(self, tracker_module):
+        tracker = tracker_module.StatusTracker()
+        homework = {'homework_name': 'hw123', 'status': 'approved'}
+        tracker.update([homework])
+        assert tracker.statuses == {'hw123': 'approved'}
+
+    def test_seed_reports_only_newest(self, tracker_module):
+        tracker = tracker_module.StatusTracker()
+        homeworks = [
+            {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            {'id': 3, 'homework_name': 'hw3', 'status': 'approved'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'rejected'},
+        ]
+        assert tracker.transitions(iter(homeworks)) == [homeworks[0]], (
+            'Без контрольной точки изменением считается только самая '
+            'свежая домашка.'
+        )
+        assert tracker.statuses == {'2': 'approved', '1': 'rejected'}
+        assert tracker.transitions(homeworks) == [homeworks[0]]
+
+    def test_seed_clears_on_broken_response(self, tracker_module):
+        tracker = tracker_module.StatusTracker()
+
+        def broken():
+            yield {'id': 2, 'homework_name': 'hw2', 'status': 'approved'}
+            yield {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+            raise TypeError('broken')
+
+        with pytest.raises(TypeError):
+            tracker.transitions(broken())
+        assert len(tracker) == 0, (
+            'Недочитанный ответ не должен оставлять трекер частично '
+            'заполненным.'
+        )
+
+    def run_main(self, monkeypatch, homework_module, data):
+        sent = []
+
+        def stop_loop(secs):
+            raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+            utils.MockResponseGET(data=data)))
+        monkeypatch.setattr(telegram, 'Bot', lambda **kwargs: None)
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, message: sent.append(message))
+        monkeypatch.setattr(time, 'sleep', stop_loop)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        return sent
+
+    def test_main_sends_every_transition(self, tmp_path, monkeypatch,
+                                         homework_module, random_timestamp):
+        import state_store
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_store.StateStore(path)
+        store.save(homework_module.TELEGRAM_CHAT_ID, random_timestamp, None,
+                   {'1': 'reviewing', '2': 'reviewing'})
+        store.close()
+        monkeypatch.setattr(homework_module, 'STATE_FILE', path)
+        data = {
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': random_timestamp,
+        }
+        sent = self.run_main(monkeypatch, homework_module, data)
+
+        assert len(sent) == 2, (
+            'Бот должен сообщать об изменении статуса каждой домашки.'
+        )
+        assert sent[0].startswith('Изменился статус проверки работы "hw1"')
+        assert sent[1].startswith('Изменился статус проверки работы "hw2"')
+
+    def test_main_cold_start_sends_newest(self, monkeypatch, homework_module,
+                                          random_timestamp):
+        data = {
+            'homeworks': [
+                {'id': number, 'homework_name': f'hw{number}',
+                 'status': 'approved'}
+                for number in range(300, 0, -1)
+            ],
+            'current_date': random_timestamp,
+        }
+        sent = self.run_main(monkeypatch, homework_module, data)
+
+        assert len(sent) == 1, (
+            'При первом запуске бот не должен сообщать обо всей истории '
+            'аккаунта, только о самой свежей домашке.'
+        )
+        assert sent[0].startswith('Изменился статус проверки работы "hw300"')
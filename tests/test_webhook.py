@@ -0,0 +1,136 @@
+import http.client
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def webhook_module():
+    import webhook
+    return webhook
+
+
+@pytest.fixture
+def receiver(webhook_module):
+    import tenants
+    delivered = []
+    tenant_list = tenants.parse_tenants_spec('token:111')
+    server = webhook_module.WebhookServer(
+        tenant_list, lambda chat_id, text: delivered.append((chat_id, text)),
+        secret='s3cret', host='127.0.0.1', port=0,
+    )
+    server.start(poll_interval=0.05)
+    yield server, delivered, tenant_list[0]
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, data, secret='s3cret'):
+    port = server.server_address[1]
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}{path}',
+        data=data if isinstance(data, bytes) else json.dumps(data).encode(),
+        headers={'X-Webhook-Secret': secret},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request) as answer:
+            return answer.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+class TestWebhook:
+
+    def test_push_event_is_delivered(self, receiver, random_timestamp):
+        server, delivered, tenant = receiver
+        event = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': random_timestamp,
+        }
+        assert post(server, '/homeworks/111', event) == 202
+        assert len(delivered) == 1
+        assert delivered[0][0] == '111'
+        assert 'Работа проверена' in delivered[0][1]
+        assert tenant.timestamp == 0, (
+            '`current_date` push-события не должно сдвигать опрос.'
+        )
+
+        assert post(server, '/homeworks/111', event) == 202
+        assert len(delivered) == 1, (
+            'Повторное событие с тем же статусом не должно отправляться.'
+        )
+
+    def test_future_push_does_not_disable_polling(self, receiver):
+        import tenants
+        server, delivered, tenant = receiver
+        post(server, '/homeworks/111', {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'reviewing'}],
+            'current_date': 2 ** 40,
+        })
+        poll = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': 100,
+        }
+        assert len(tenants.handle_response(tenant, poll)) == 1, (
+            'Опрос после push-события из будущего не должен '
+            'считаться устаревшим.'
+        )
+        assert tenant.timestamp == 100
+
+    def test_secret_is_required(self, webhook_module, monkeypatch):
+        import tenants
+        tenant_list = tenants.parse_tenants_spec('token:111')
+        with pytest.raises(ValueError):
+            webhook_module.WebhookServer(tenant_list, print, secret=None,
+                                         host='127.0.0.1', port=0)
+        monkeypatch.setattr(webhook_module, 'WEBHOOK_SECRET', None)
+        with pytest.raises(webhook_module.EnvironmentVariableMissing):
+            webhook_module.main()
+
+    @pytest.mark.parametrize('path, data, secret, status', [
+        ('/homeworks/111', {'homeworks': [], 'current_date': 1}, 'bad', 401),
+        ('/homeworks/999', {'homeworks': [], 'current_date': 1},
+         's3cret', 404),
+        ('/homeworks/111', {'homeworks': {}, 'current_date': 1},
+         's3cret', 400),
+        ('/homeworks/111', b'not json', 's3cret', 400),
+        ('/homeworks/111', {'homeworks': [1], 'current_date': 1},
+         's3cret', 400),
+    ])
+    def test_rejected_events(self, receiver, path, data, secret, status):
+        server, delivered, _ = receiver
+        assert post(server, path, data, secret) == status
+        assert delivered == []
+
+    @pytest.mark.parametrize('length', ['abc', '-1'])
+    def test_bad_content_length(self, receiver, length):
+        server, delivered, _ = receiver
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.putrequest('POST', '/homeworks/111')
+        connection.putheader('X-Webhook-Secret', 's3cret')
+        connection.putheader('Content-Length', length)
+        connection.endheaders()
+        assert connection.getresponse().status == 400, (
+            'Некорректная длина тела должна отклоняться с кодом 400.'
+        )
+        connection.close()
+        assert delivered == []
+
+    def test_processing_error_is_500(self, receiver):
+        server, delivered, _ = receiver
+        event = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': ['approved']}],
+            'current_date': 1,
+        }
+        assert post(server, '/homeworks/111', event) == 500, (
+            'Сбой обработки push-события должен возвращать код 500, '
+            'а не обрывать соединение.'
+        )
+        assert delivered == []
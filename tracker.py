@@ -0,0 +1,94 @@
+"""Отслеживание изменений статусов всех домашек из ответа API."""
+import sys
+
+
+def homework_key(homework):
+    """Ключ домашки: ``id``, если API его прислал, иначе название."""
+    key = homework.get('id')
+    if key is None:
+        key = homework.get('homework_name')
+    return str(key)
+
+
+class StatusTracker:
+    """Последний известный статус каждой домашки.
+
+    Хранит только словарь ``ключ домашки -> статус``; строки статусов
+    интернируются, поэтому у тысяч домашек они общие.
+    """
+
+    __slots__ = ('statuses',)
+
+    def __init__(self, statuses=None):
+        """Трекер с известными статусами ``statuses``."""
+        self.statuses = {
+            key: sys.intern(status) for key, status in (statuses or {}).items()
+        }
+
+    def changes(self, homeworks):
+        """Домашки, статус которых изменился, от старых к новым.
+
+        API возвращает домашки от последней изменённой к первой, поэтому
+        порядок разворачивается. Состояние трекера не меняется, пока не
+        вызван ``update``.
+        """
+        changed = []
+        seen = set()
+        for homework in homeworks or ():
+            key = homework_key(homework)
+            if key in seen:
+                continue
+            seen.add(key)
+            if self.statuses.get(key) != homework.get('status'):
+                changed.append(homework)
+        changed.reverse()
+        return changed
+
+    def transitions(self, homeworks):
+        """Домашки, о которых нужно сообщить.
+
+        Пустой трекер заполняется через ``seed``, иначе возвращаются
+        ``changes``.
+        """
+        if self.statuses:
+            return self.changes(homeworks)
+        return self.seed(homeworks)
+
+    def seed(self, homeworks):
+        """Первое заполнение пустого трекера, без контрольной точки.
+
+        Об истории аккаунта не сообщается: статусы запоминаются по мере
+        чтения, а изменением считается только самая свежая домашка
+        (первая в ответе), как и до отслеживания всех домашек. Она
+        запоминается через ``update`` после отправки сообщения. Если
+        чтение ответа прервалось ошибкой, трекер снова очищается.
+        """
+        statuses = self.statuses
+        newest = None
+        try:
+            for homework in homeworks or ():
+                if newest is None:
+                    newest = homework
+                    newest_key = homework_key(homework)
+                    continue
+                key = homework_key(homework)
+                status = homework.get('status')
+                if key != newest_key and status is not None:
+                    statuses.setdefault(key, sys.intern(status))
+        except BaseException:
+            statuses.clear()
+            raise
+        if newest is None or newest.get('status') is None:
+            return []
+        return [newest]
+
+    def update(self, homeworks):
+        """Запоминание статусов обработанных домашек."""
+        for homework in homeworks:
+            status = homework.get('status')
+            if status is not None:
+                self.statuses[homework_key(homework)] = sys.intern(status)
+
+    def __len__(self):
+        """Число отслеживаемых домашек."""
+        return len(self.statuses)
@@ -0,0 +1,219 @@
+"""Приём push-событий о статусах домашек.
+
+Локальный HTTP-сервер принимает ``POST /homeworks/<тенант>`` с телом в
+том же формате, что и ответ API (``homeworks`` и ``current_date``), и
+сразу отправляет сообщения об изменениях. Опрос API остаётся страховкой
+и идёт редко — раз в ``WEBHOOK_FALLBACK_PERIOD`` секунд.
+
+Без ``WEBHOOK_SECRET`` приёмник не запускается: иначе любой, кто
+достучится до порта, сможет писать в чаты студентов. По умолчанию
+сервер слушает только локальный интерфейс (``WEBHOOK_HOST``).
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sys import stdout
+
+import commands
+import delivery
+import history
+import homework
+import lazy
+import lifecycle
+import log_pipeline
+import metrics
+import scheduling
+import state_store
+import streaming
+import tenants
+from exceptions import EmptyResponseAPI, EnvironmentVariableMissing
+
+telegram = lazy.LazyModule('telegram')
+
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_FALLBACK_PERIOD = int(
+    os.getenv('WEBHOOK_FALLBACK_PERIOD', homework.RETRY_PERIOD * 6))
+SECRET_HEADER = 'X-Webhook-Secret'
+PATH_PREFIX = '/homeworks/'
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def check_event(response):
+    """Проверка push-события: ответ API, в котором все домашки — словари."""
+    for item in homework.check_response(response):
+        if not isinstance(item, dict):
+            raise TypeError(streaming.NOT_HOMEWORK)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+
+    def reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def read_event(self):
+        """Проверенное тело события или None, если оно слишком велико."""
+        length = int(self.headers.get('Content-Length', 0))
+        if length < 0:
+            raise ValueError(f'Некорректная длина тела: {length}')
+        if length > MAX_BODY_SIZE:
+            return None
+        response = json.loads(self.rfile.read(length))
+        check_event(response)
+        return response
+
+    def do_POST(self):
+        server = self.server
+        secret = self.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(secret, server.secret):
+            self.reply(HTTPStatus.UNAUTHORIZED)
+            return
+        if not self.path.startswith(PATH_PREFIX):
+            self.reply(HTTPStatus.NOT_FOUND)
+            return
+        tenant = server.tenants.get(self.path[len(PATH_PREFIX):])
+        if tenant is None:
+            self.reply(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            response = self.read_event()
+        except (ValueError, TypeError, EmptyResponseAPI) as error:
+            logging.warning('Отклонено push-событие: %s', error)
+            metrics.count_error(error)
+            self.reply(HTTPStatus.BAD_REQUEST)
+            return
+        if response is None:
+            self.reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            server.receive(tenant, response)
+        except Exception as error:
+            logging.exception('%s: push-событие не обработано', tenant.name)
+            metrics.count_error(error)
+            self.reply(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        self.reply(HTTPStatus.ACCEPTED)
+
+    def log_message(self, *args):
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Приёмник push-событий.
+
+    ``deliver(chat_id, message)`` вызывается для каждого сообщения;
+    обычно это ``DeliveryQueue.put``. Без ``secret`` сервер не
+    создаётся.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, tenant_list, deliver, secret=WEBHOOK_SECRET,
+                 host=WEBHOOK_HOST, port=WEBHOOK_PORT, store=None,
+                 log=None):
+        """Сервер на ``host``:``port`` для тенантов ``tenant_list``."""
+        if not secret:
+            raise ValueError('Приёмник push-событий требует секрет')
+        super().__init__((host, port), _WebhookHandler)
+        self.set_tenants(tenant_list)
+        self.deliver = deliver
+        self.secret = secret
+        self.store = store
+        self.log = log
+        self.received = 0
+
+    def set_tenants(self, tenant_list):
+        """Замена списка тенантов, например после перезагрузки."""
+        self.tenants = {str(tenant.name): tenant for tenant in tenant_list}
+
+    def receive(self, tenant, response):
+        """Обработка проверенного push-события.
+
+        События приостановленного тенанта отбрасываются: изменения
+        за время паузы придут с первым опросом после ``/resume``.
+        """
+        if tenant.paused:
+            return
+        with tenant.lock:
+            messages = tenants.handle_response(tenant, response, self.log,
+                                               push=True)
+        for message in messages:
+            self.deliver(tenant.chat_id, message)
+        if self.store is not None:
+            tenants.checkpoint(self.store, tenant)
+        self.received += 1
+
+    def start(self, poll_interval=0.5):
+        """Запуск сервера в фоновом потоке."""
+        threading.Thread(target=self.serve_forever, daemon=True,
+                         name='webhook',
+                         kwargs={'poll_interval': poll_interval}).start()
+        return self
+
+
+def main():
+    """Приём push-событий и редкий страховочный опрос API."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Отсустсвует обязательная переменная окружения '
+                         'TELEGRAM_TOKEN')
+        raise EnvironmentVariableMissing('TELEGRAM_TOKEN')
+    if not WEBHOOK_SECRET:
+        logging.critical('Отсустсвует обязательная переменная окружения '
+                         'WEBHOOK_SECRET')
+        raise EnvironmentVariableMissing('WEBHOOK_SECRET')
+
+    tenant_list = tenants.load_tenants()
+    for tenant in tenant_list:
+        tenant.policy = scheduling.FixedPolicy(WEBHOOK_FALLBACK_PERIOD)
+    metrics.start_server_from_env()
+    store = state_store.open_store(tenants.STATE_FILE)
+    log = history.open_log(tenants.STATE_FILE)
+    tenants.restore_state(store, tenant_list)
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    queue = delivery.DeliveryQueue(bot).start()
+    server = WebhookServer(tenant_list, queue.put, store=store,
+                           log=log).start()
+    logging.info('Приём push-событий на %s:%s', WEBHOOK_HOST, WEBHOOK_PORT)
+    command_bot = commands.start_from_env(tenant_list,
+                                          homework.TELEGRAM_TOKEN)
+
+    def reload(current):
+        updated = tenants.reload_tenants(store, current)
+        for tenant in updated:
+            if tenant not in current:
+                tenant.policy = scheduling.FixedPolicy(
+                    WEBHOOK_FALLBACK_PERIOD)
+        server.set_tenants(updated)
+        if command_bot is not None:
+            command_bot.set_tenants(updated)
+        return updated
+
+    scheduler = tenants.TenantScheduler(
+        bot, tenant_list, period=WEBHOOK_FALLBACK_PERIOD, store=store,
+        queue=queue, log=log,
+    )
+    with lifecycle.Lifecycle() as signals:
+        try:
+            scheduler.run_forever(signals, reload)
+        finally:
+            server.shutdown()
+            if command_bot is not None:
+                command_bot.stop()
+            tenants.shutdown(store, queue, scheduler.tenants)
+            log.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=log_pipeline.LOG_LEVEL,
+        handlers=log_pipeline.handlers(stdout),
+    )
+
+    main()